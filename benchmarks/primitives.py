@@ -0,0 +1,172 @@
+# Micro-benchmarks for the primitives the solvers spend their time in.
+#
+#   python -m benchmarks.primitives                   # table on stdout
+#   python -m benchmarks.primitives -o primitives.json
+#   python -m benchmarks.primitives --resample         # rebuild the position corpus
+#
+# Every primitive runs over the same fixed corpus of positions, sampled once from
+# real A* searches on the saved maps and stored in benchmarks/positions.json, so
+# results stay comparable while the solvers change. ns/op is the best of
+# --repeat timed passes over the corpus. CPython has no cumulative allocation
+# counter, so memory is reported per call as the tracemalloc peak above the
+# starting point (bytes of temporaries) and the number of memory blocks still
+# held afterwards.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from src.engine import ChessPuzzle, AStarSolver, MODES
+from src.entities.zobrist import state_zobrist
+from src.algorithms.state_index import OccupancyIndex
+
+FORMAT_VERSION = 1
+DATA_URL = "data/"
+CORPUS_PATH = "benchmarks/positions.json"
+CORPUS_SEED = 20240501
+# Positions kept per mode, and A* steps recorded per board before sampling.
+POSITIONS_PER_MODE = 200
+STEPS_PER_BOARD = 300
+# Shortest timed pass; short primitives loop over the corpus until it is reached.
+MIN_PASS_SECONDS = 0.05
+
+def sample_corpus(per_mode: int = POSITIONS_PER_MODE, seed: int = CORPUS_SEED) -> dict[str, list[str]]:
+    """Positions seen by A* on every saved board, as hex States, `per_mode` per mode."""
+    rng = random.Random(seed)
+    corpus = {}
+    for mode in MODES:
+        with open(DATA_URL + f"chess_{mode}/puzzle_map.json", "r") as f:
+            maps = json.load(f)
+        seen = {}
+        for boards in maps.values():
+            for board in boards:
+                solver = AStarSolver(ChessPuzzle(mode, board))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for _ in range(STEPS_PER_BOARD):
+                        state, move = solver.take_action()
+                        if state is None and move is None:
+                            break
+                        seen[state] = None
+        states = list(seen)
+        corpus[mode] = [state.hex() for state in rng.sample(states, min(per_mode, len(states)))]
+    return corpus
+
+def load_corpus(resample: bool = False) -> dict[str, list[bytes]]:
+    if resample or not os.path.exists(CORPUS_PATH):
+        with open(CORPUS_PATH, "w") as f:
+            json.dump({"format": FORMAT_VERSION, "seed": CORPUS_SEED, "positions": sample_corpus()}, f)
+    with open(CORPUS_PATH, "r") as f:
+        data = json.load(f)
+    return {mode: [bytes.fromhex(state) for state in states] for mode, states in data["positions"].items()}
+
+def primitives(mode: str, states: list[bytes]) -> dict[str, tuple]:
+    """name -> (function of one item, items) for one mode's positions."""
+    envs = [ChessPuzzle(mode, state) for state in states]
+    boards = [env.board for env in envs]
+    # import_board resets solo move counts, so it gets boards of its own.
+    scratch = [(ChessPuzzle(mode, state).board, board.export_board()) for state, board in zip(states, boards)]
+    moves = [(env, move) for env in envs for move in env.board.get_all_valid_moves()]
+    sources = [(board, (square >> 3, square & 7)) for board in boards for square in range(64) if board.occupied >> square & 1]
+    pairs = [(board, (s >> 3, s & 7), (t >> 3, t & 7)) for board in boards
+             for s in range(64) if board.occupied >> s & 1
+             for t in range(64) if board.occupied >> t & 1 and s != t]
+    indices = [(index, state) for index, state in ((OccupancyIndex.for_state(state), state) for state in states) if index is not None]
+
+    def push_pop(item):
+        env, move = item
+        env.push(move)
+        env.pop()
+
+    return {
+        "get_all_valid_moves": (lambda board: board.get_all_valid_moves(), boards),
+        "get_all_valid_moves(specific_pos)": (lambda item: item[0].get_all_valid_moves(specific_pos=item[1]), sources),
+        "is_path_clear": (lambda item: item[0].is_path_clear(item[1], item[2]), pairs),
+        "import_board": (lambda item: item[0].import_board(item[1]), scratch),
+        "export_board": (lambda board: board.export_board(), boards),
+        "get_state": (lambda env: env.get_state(), envs),
+        "set_state": (lambda item: item[0].set_state(item[1]), list(zip(envs, states))),
+        "push+pop": (push_pop, moves),
+        "state_zobrist": (state_zobrist, states),
+        "OccupancyIndex.index": (lambda item: item[0].index(item[1]), indices),
+        "calculate_heuristic": (lambda env: env.calculate_heuristic(), envs),
+    }
+
+def time_per_op(fn, items: list, repeat: int) -> float:
+    """Best ns per call over `repeat` passes."""
+    loops = 1
+    while True:
+        start_t = time.perf_counter()
+        for _ in range(loops):
+            for item in items:
+                fn(item)
+        elapsed = time.perf_counter() - start_t
+        if elapsed >= MIN_PASS_SECONDS:
+            break
+        loops *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start_t = time.perf_counter()
+        for _ in range(loops):
+            for item in items:
+                fn(item)
+        best = min(best, time.perf_counter() - start_t)
+    return best / (loops * len(items)) * 1e9
+
+def memory_per_op(fn, items: list) -> tuple[float, float]:
+    """Mean (peak temporary bytes, blocks still held) per call."""
+    peak_bytes = 0
+    tracemalloc.start()
+    try:
+        # One untraced-to-traced pass first: objects replaced by the calls (boards
+        # rebuilt by import_board, say) are then traced when they are freed.
+        for item in items:
+            fn(item)
+        before = tracemalloc.take_snapshot()
+        for item in items:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn(item)
+            peak_bytes += tracemalloc.get_traced_memory()[1] - current
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    held = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return peak_bytes / len(items), held / len(items)
+
+def run_primitives(modes, names=None, repeat: int = 5, resample: bool = False, log=print) -> dict:
+    corpus = load_corpus(resample)
+    results = []
+    for mode in modes:
+        for name, (fn, items) in primitives(mode, corpus[mode]).items():
+            if names and name not in names or not items:
+                continue
+            ns = time_per_op(fn, items, repeat)
+            peak_bytes, held_blocks = memory_per_op(fn, items)
+            results.append({"primitive": name, "mode": mode, "items": len(items), "ns_per_op": round(ns, 1),
+                            "peak_bytes_per_op": round(peak_bytes, 1), "held_blocks_per_op": round(held_blocks, 3)})
+            log(f"{name:34} {mode:6} {ns:10.0f} ns/op {peak_bytes:9.0f} B/op {held_blocks:6.2f} blocks/op  ({len(items)} items)")
+    return {"format": FORMAT_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": repeat, "results": results}
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark move generation, hashing and the heuristic on a fixed position corpus.")
+    parser.add_argument("--mode", choices=MODES, action="append", help="mode to run (repeatable, default: all)")
+    parser.add_argument("--primitive", action="append", help="primitive to run (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes, the best is kept")
+    parser.add_argument("--resample", action="store_true", help="rebuild " + CORPUS_PATH + " from fresh searches")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run_primitives(args.mode or list(MODES), args.primitive, args.repeat, args.resample)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,233 @@
+# End-to-end solver benchmark over the bundled puzzle maps.
+#
+#   python -m benchmarks.solvers -o baseline.json
+#   python -m benchmarks.solvers --compare baseline.json
+#
+# Each (mode, piece count, solver) group runs every saved board of that size
+# (or the first --boards) from a cold start: the DFS dead-state cache is cleared
+# before each search. Times are the best of --repeat runs; peak memory comes
+# from one extra run under tracemalloc, so the timed runs are not slowed down.
+# --compare exits with status 1 when a group regressed past --threshold. Times
+# are first scaled by a fixed pure-Python calibration workload timed in both
+# runs, so a slower or busier machine is not reported as a regression. "nodes"
+# counts expanded nodes; --timing adds each group's time per search phase,
+# measured in separate runs since the clock calls slow the search down.
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from src.engine import ChessPuzzle, AStarSolver, BFSSolver, DFSSolver, MODES, SearchBudget, load_tablebase
+from src.algorithms.budget import DEFAULT_MAX_EXPANSIONS
+from src.algorithms.dead_states import dead_states
+from src.algorithms.stats import PHASES
+
+FORMAT_VERSION = 2
+DATA_URL = "data/"
+
+SOLVERS = {
+    "astar": AStarSolver,
+    "bfs": BFSSolver,
+    "dfs": DFSSolver,
+}
+
+# Relative change that counts as a regression, and the time below which a group
+# is too short to compare; totals per mode and solver are compared as well.
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_SECONDS = 0.1
+
+def calibrate(rounds: int = 5) -> float:
+    """Best time of a fixed workload of dict, set and integer operations like the solvers' inner loops."""
+    best = float("inf")
+    for _ in range(rounds):
+        start_t = time.perf_counter()
+        seen = set()
+        table = {}
+        key = 0x9E3779B97F4A7C15
+        for i in range(200_000):
+            key = (key ^ (key >> 7) ^ i) * 0x100000001B3 & 0xFFFFFFFFFFFFFFFF
+            if key not in seen:
+                seen.add(key)
+                table[key & 0xFFFF] = i
+        best = min(best, time.perf_counter() - start_t)
+    return best
+
+def load_boards(mode: str) -> dict[int, list]:
+    with open(DATA_URL + f"chess_{mode}/puzzle_map.json", "r") as f:
+        return {int(pieces): boards for pieces, boards in json.load(f).items()}
+
+def run_once(solver_class, mode: str, board: list[list[int]], max_expansions: int,
+             timing: bool = False) -> tuple[bool, dict, float]:
+    """One cold search. Returns (solved, SearchStats.as_dict(), seconds)."""
+    dead_states(mode).clear()
+    start_t = time.perf_counter()
+    # Only the expansion limit: time and memory limits would make the results depend on the machine.
+    solver = solver_class(ChessPuzzle(mode, board), timing, SearchBudget(max_expansions or None))
+    while True:
+        state, move = solver.take_action()
+        if state is None and move is None:
+            break
+    seconds = time.perf_counter() - start_t
+    solver.close()
+    return solver.solution_found, solver.get_stats().as_dict(), seconds
+
+def peak_memory_kb(solver_class, mode: str, board: list[list[int]], max_expansions: int) -> int:
+    tracemalloc.start()
+    try:
+        run_once(solver_class, mode, board, max_expansions)
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+def bench_group(solver_class, mode: str, boards: list, repeat: int, max_expansions: int, memory: bool,
+                timing: bool = False) -> dict:
+    solved = nodes = generated = duplicates = visited = frontier_peak = memory_peak = estimate_peak = 0
+    seconds = 0.0
+    solve_times = []
+    times = dict.fromkeys(PHASES, 0.0)
+    for board in boards:
+        runs = [run_once(solver_class, mode, board, max_expansions) for _ in range(repeat)]
+        found, stats, _ = runs[0]
+        best = min(run[2] for run in runs)
+        solved += found
+        nodes += stats["expanded"]
+        generated += stats["generated"]
+        duplicates += stats["duplicates"]
+        visited += stats["visited"]
+        seconds += best
+        frontier_peak = max(frontier_peak, stats["frontier_peak"])
+        estimate_peak = max(estimate_peak, stats["memory_peak"])
+        if found:
+            solve_times.append(best)
+        if memory:
+            memory_peak = max(memory_peak, peak_memory_kb(solver_class, mode, board, max_expansions))
+        if timing:
+            for phase, spent in run_once(solver_class, mode, board, max_expansions, True)[1]["times"].items():
+                times[phase] += spent
+    return {
+        "boards": len(boards),
+        "solved": solved,
+        "nodes": nodes,
+        "generated": generated,
+        "duplicates": duplicates,
+        "visited": visited,
+        "seconds": round(seconds, 6),
+        "nodes_per_sec": round(nodes / seconds, 1) if seconds else None,
+        "frontier_peak": frontier_peak,
+        "peak_memory_kb": memory_peak if memory else None,
+        # The solvers' own estimate (SearchStats.memory_peak), next to the traced peak above.
+        "estimated_memory_kb": estimate_peak // 1024,
+        "time_to_solution_mean": round(sum(solve_times) / len(solve_times), 6) if solve_times else None,
+        "time_to_solution_max": round(max(solve_times), 6) if solve_times else None,
+        "phase_seconds": {phase: round(spent, 6) for phase, spent in times.items()} if timing else None,
+    }
+
+def run_benchmarks(modes, algorithms, pieces=None, boards_per_group=None, repeat=3,
+                   max_expansions=DEFAULT_MAX_EXPANSIONS, memory=True, timing=False, log=print) -> dict:
+    results = []
+    calibration = calibrate()
+    for mode in modes:
+        for count, boards in sorted(load_boards(mode).items()):
+            if pieces and count not in pieces:
+                continue
+            boards = boards[:boards_per_group] if boards_per_group else boards
+            for algorithm in algorithms:
+                # The solvers announce every solution with print().
+                with contextlib.redirect_stdout(io.StringIO()):
+                    group = bench_group(SOLVERS[algorithm], mode, boards, repeat, max_expansions, memory, timing)
+                group = {"mode": mode, "pieces": count, "algorithm": algorithm, **group}
+                results.append(group)
+                log(f"{mode:6} {count:2} {algorithm:5}  {group['solved']}/{group['boards']} solved  "
+                    f"{group['seconds']:8.3f}s  {group['nodes_per_sec'] or 0:10.0f} nodes/s  "
+                    f"frontier {group['frontier_peak']}")
+    return {
+        "format": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        # Averaged over the start and the end of the run.
+        "calibration_seconds": round((calibration + calibrate()) / 2, 6),
+        "config": {"repeat": repeat, "boards": boards_per_group, "max_expansions": max_expansions, "timing": timing,
+                   "tablebase": {mode: load_tablebase(mode) is not None for mode in modes}},
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            min_seconds: float = DEFAULT_MIN_SECONDS) -> list[str]:
+    """Regressions of `current` against `baseline`, one message per problem."""
+    if baseline.get("format") != current["format"]:
+        raise ValueError(f"baseline has format {baseline.get('format')}, expected {current['format']}; record a new one")
+    if current["config"]["tablebase"] != baseline["config"].get("tablebase"):
+        print("warning: tablebase availability differs from the baseline", file=sys.stderr)
+    scale = baseline["calibration_seconds"] / current["calibration_seconds"]
+    old = {(r["mode"], r["pieces"], r["algorithm"]): r for r in baseline["results"]}
+    problems = []
+    totals: dict[tuple[str, str], list[float]] = {}
+    for r in current["results"]:
+        key = (r["mode"], r["pieces"], r["algorithm"])
+        b = old.get(key)
+        if b is None:
+            continue
+        total = totals.setdefault((r["mode"], r["algorithm"]), [0.0, 0.0])
+        seconds = r["seconds"] * scale
+        total[0] += b["seconds"]
+        total[1] += seconds
+        name = "{} {} {}".format(*key)
+        if r["nodes"] != b["nodes"]:
+            print(f"note: {name} searched {b['nodes']} -> {r['nodes']} nodes; the search itself changed", file=sys.stderr)
+        if r["solved"] < b["solved"]:
+            problems.append(f"{name}: solved {b['solved']} -> {r['solved']}")
+        if max(seconds, b["seconds"]) >= min_seconds and seconds > b["seconds"] * (1 + threshold):
+            problems.append(f"{name}: time {b['seconds']:.3f}s -> {seconds:.3f}s (scaled)")
+        for field in ("frontier_peak", "peak_memory_kb"):
+            if r[field] is not None and b.get(field) and r[field] > b[field] * (1 + threshold):
+                problems.append(f"{name}: {field} {b[field]} -> {r[field]}")
+    for (mode, algorithm), (old_seconds, new_seconds) in totals.items():
+        if old_seconds >= min_seconds and new_seconds > old_seconds * (1 + threshold):
+            problems.append(f"{mode} {algorithm} total: time {old_seconds:.3f}s -> {new_seconds:.3f}s (scaled)")
+    return problems
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the solvers on the bundled puzzle maps.")
+    parser.add_argument("--mode", choices=MODES, action="append", help="mode to run (repeatable, default: all)")
+    parser.add_argument("--algorithm", choices=sorted(SOLVERS), action="append", help="solver to run (repeatable, default: all)")
+    parser.add_argument("--pieces", type=int, action="append", help="piece count to run (repeatable, default: all)")
+    parser.add_argument("--boards", type=int, help="boards per piece count (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per board, the best is kept")
+    parser.add_argument("--max-expansions", type=int, default=DEFAULT_MAX_EXPANSIONS, help="nodes a search may expand before it gives up")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--timing", action="store_true", help="add one timed run per board to record time per search phase")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("format") != FORMAT_VERSION:
+            parser.error(f"{args.compare} has format {baseline.get('format')}, expected {FORMAT_VERSION}; record a new baseline")
+
+    report = run_benchmarks(args.mode or list(MODES), args.algorithm or list(SOLVERS), args.pieces,
+                            args.boards, args.repeat, args.max_expansions, not args.no_memory, args.timing,
+                            log=lambda line: print(line, file=sys.stderr))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None:
+        problems = compare(report, baseline, args.threshold)
+        for problem in problems:
+            print("REGRESSION " + problem)
+        print(f"{len(problems)} regression(s) against {args.compare}")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -27,10 +27,12 @@ class ChessPuzzleEnv:
             event_list = pygame.event.get()
             for event in event_list:
                 if event.type == pygame.QUIT:
+                    self.scene_manager.close()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
+                        self.scene_manager.close()
                         pygame.quit()
                         sys.exit()
             self.scene_manager.run(event_list)
@@ -39,5 +41,7 @@ class ChessPuzzleEnv:
             self.clock.tick(settings.FPS)
 
 if __name__ == '__main__':
+    # Loaded here rather than on import, so worker processes and headless tools skip the disk I/O.
+    settings.load_settings()
     game = ChessPuzzleEnv()
     game.run()
\ No newline at end of file
@@ -1,15 +1,31 @@
 import json
 import os
 
+from src.algorithms.budget import SearchBudget, DEFAULT_MAX_EXPANSIONS, DEFAULT_MAX_SECONDS, DEFAULT_MAX_MEMORY_MB
+
 # --- Configuration ---
 BOARD_ROWS = 8
 BOARD_COLS = 8
 SEARCH_ANIMATION = True
 PLAY_ANIMATION_DURATION = 300
 SEARCH_ANIMATION_DURATION = 10
+# Milliseconds of solver work per frame when the search animation is off
+SEARCH_FRAME_BUDGET = 15
+# Run searches without animation in a background process instead of the frame loop
+SEARCH_IN_BACKGROUND = True
+# Split search time into move generation, hashing, heuristic and queue work (adds a little overhead)
+SEARCH_STATS_TIMING = False
+# Search budget: nodes expanded, seconds and estimated MB held before a search gives up; 0 for no limit
+SEARCH_MAX_EXPANSIONS = DEFAULT_MAX_EXPANSIONS
+SEARCH_MAX_SECONDS = DEFAULT_MAX_SECONDS
+SEARCH_MEMORY_LIMIT = DEFAULT_MAX_MEMORY_MB
 PLAY_SPEED_LIMIT = (50, 1000)
 SEARCH_SPEED_LIMIT = (0, 100)
+SEARCH_FRAME_BUDGET_LIMIT = (1, 50)
 FPS_LIMIT = (30, 240)
+SEARCH_MAX_EXPANSIONS_LIMIT = (10_000, 2_000_000)
+SEARCH_MAX_SECONDS_LIMIT = (5, 600)
+SEARCH_MEMORY_LIMIT_LIMIT = (64, 4096)
 
 # Colors
 COLOR_LIGHT = (235, 236, 208)
@@ -28,7 +44,7 @@ DATA_URL = "data/"
 SETTINGS_FILE = DATA_URL + "user_settings.json"
 
 def load_settings():
-    global SEARCH_ANIMATION, PLAY_ANIMATION_DURATION, SEARCH_ANIMATION_DURATION, FPS
+    global SEARCH_ANIMATION, PLAY_ANIMATION_DURATION, SEARCH_ANIMATION_DURATION, SEARCH_FRAME_BUDGET, SEARCH_STATS_TIMING, SEARCH_MAX_EXPANSIONS, SEARCH_MAX_SECONDS, SEARCH_MEMORY_LIMIT, FPS
     
     if not os.path.exists(DATA_URL):
         os.makedirs(DATA_URL)
@@ -40,6 +56,11 @@ def load_settings():
                 SEARCH_ANIMATION = data.get("search_animation", SEARCH_ANIMATION)
                 PLAY_ANIMATION_DURATION = data.get("play_anim_duration", PLAY_ANIMATION_DURATION)
                 SEARCH_ANIMATION_DURATION = data.get("search_anim_duration", SEARCH_ANIMATION_DURATION)
+                SEARCH_FRAME_BUDGET = data.get("search_frame_budget", SEARCH_FRAME_BUDGET)
+                SEARCH_STATS_TIMING = data.get("search_stats_timing", SEARCH_STATS_TIMING)
+                SEARCH_MAX_EXPANSIONS = data.get("search_max_expansions", SEARCH_MAX_EXPANSIONS)
+                SEARCH_MAX_SECONDS = data.get("search_max_seconds", SEARCH_MAX_SECONDS)
+                SEARCH_MEMORY_LIMIT = data.get("search_memory_limit", SEARCH_MEMORY_LIMIT)
                 FPS = data.get("fps", FPS)
         except:
             print("Error loading settings, using defaults.")
@@ -47,14 +68,24 @@ def load_settings():
     else:
         save_settings()
 
+def search_budget(timed: bool = True) -> SearchBudget:
+    """
+    The budget for a search started from the game. Animated searches spend most
+    of their wall time animating, so they are started with timed=False.
+    """
+    return SearchBudget.from_options(SEARCH_MAX_EXPANSIONS, SEARCH_MAX_SECONDS if timed else 0, SEARCH_MEMORY_LIMIT)
+
 def save_settings():
     data = {
         "search_animation": SEARCH_ANIMATION,
         "play_anim_duration": PLAY_ANIMATION_DURATION,
         "search_anim_duration": SEARCH_ANIMATION_DURATION,
+        "search_frame_budget": SEARCH_FRAME_BUDGET,
+        "search_stats_timing": SEARCH_STATS_TIMING,
+        "search_max_expansions": SEARCH_MAX_EXPANSIONS,
+        "search_max_seconds": SEARCH_MAX_SECONDS,
+        "search_memory_limit": SEARCH_MEMORY_LIMIT,
         "fps": FPS
     }
     with open(SETTINGS_FILE, 'w') as f:
         json.dump(data, f, indent=4)
-
-load_settings()
\ No newline at end of file
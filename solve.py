@@ -0,0 +1,261 @@
+# Headless batch solver: runs one solver over every board of a puzzle catalogue
+# and writes one JSON line per board. Imports neither pygame nor settings.
+#
+#   python solve.py --algorithm astar                      # every bundled mode
+#   python solve.py --mode melee --maps my_maps.json -o results.jsonl
+#   python solve.py --mode melee --checkpoint-dir ckpt --slice 3600   # rerun to carry on
+#   python solve.py --algorithm hda --listen 0.0.0.0:5000 --nodes 2 --authkey KEY
+#   python -m src.algorithms.hda --connect HOST:5000 --rank 0 --authkey KEY      # on each node, ranks 0 and 1
+#
+# Maps files use the puzzle_map.json layout: {"<pieces>": [board, ...]}.
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+from src.engine import ALGORITHMS, MODES, ChessPuzzle, SearchBudget, HDASolver
+from src.algorithms.budget import DEFAULT_MAX_EXPANSIONS, DEFAULT_MAX_SECONDS, DEFAULT_MAX_MEMORY_MB
+from src.algorithms.checkpoint import CheckpointError, load_checkpoint, save_checkpoint
+from src.algorithms.hda import parse_address
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DATA_URL = "data/"
+# Allocation sites kept from a --tracemalloc snapshot.
+TRACE_TOP = 5
+# Seconds between checkpoints of a search.
+DEFAULT_CHECKPOINT_INTERVAL = 300
+# Solver steps between looks at the clock for checkpoints and time slices.
+CHECKPOINT_POLL_INTERVAL = 256
+
+def maps_path(mode: str) -> str:
+    return DATA_URL + f"chess_{mode}/puzzle_map.json"
+
+def rss_kb() -> int | None:
+    """Resident set size of this process in KiB, or its peak where the current value is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def replays(mode: str, board: list[list[int]], path: list[tuple[int, int, int, int]]) -> bool:
+    """Whether `path` is legal from `board` and leaves a single piece."""
+    env = ChessPuzzle(mode, board)
+    return all(env.push(move) for move in path) and env.board.count_pieces() == 1
+
+def checkpoint_path(checkpoint_dir: str, algorithm: str, mode: str, pieces: str, index: int) -> str:
+    return os.path.join(checkpoint_dir, f"{mode}-{pieces}-{index}-{algorithm}.ckpt")
+
+def solve_map(algorithm: str, mode: str, pieces: str, index: int, board: list[list[int]], budget: SearchBudget,
+              timing: bool = False, trace: bool = False, checkpoint_dir: str | None = None,
+              checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, time_slice: float = 0,
+              solver_options: dict | None = None) -> dict:
+    """Searches one board; the returned record is one output line."""
+    record = {"mode": mode, "pieces": int(pieces), "index": index, "algorithm": algorithm}
+    checkpoint = checkpoint_path(checkpoint_dir, algorithm, mode, pieces, index) if checkpoint_dir else None
+    start_t = time.perf_counter()
+    # The solvers announce solutions with print(); keep stdout for the JSON lines.
+    with contextlib.redirect_stdout(sys.stderr):
+        record.update(run_solver(algorithm, mode, board, budget, timing, trace, checkpoint, checkpoint_interval, time_slice,
+                                 solver_options))
+    record.update(wall_time=round(time.perf_counter() - start_t, 6), rss_kb=rss_kb())
+    return record
+
+def traced_memory() -> dict:
+    """Peak traced memory and the largest allocation sites still held, from the running tracemalloc."""
+    top = tracemalloc.take_snapshot().statistics("lineno")[:TRACE_TOP]
+    return {"peak_kb": tracemalloc.get_traced_memory()[1] // 1024,
+            "top": [{"site": f"{os.path.relpath(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                     "kb": stat.size // 1024, "blocks": stat.count} for stat in top]}
+
+def start_solver(algorithm: str, mode: str, board: list[list[int]], budget: SearchBudget, timing: bool,
+                 checkpoint: str | None, solver_options: dict | None = None):
+    """
+    The search for a board, carried on from its checkpoint when there is one.
+    solver_options are extra keyword arguments for the solver's class. Returns
+    (solver, resumed).
+    """
+    if checkpoint is not None and os.path.exists(checkpoint):
+        try:
+            return load_checkpoint(ALGORITHMS[algorithm], ChessPuzzle(mode, board), checkpoint, timing, budget), True
+        except CheckpointError as e:
+            print(f"Starting over: {e}", file=sys.stderr)
+    return ALGORITHMS[algorithm](ChessPuzzle(mode, board), timing, budget, **(solver_options or {})), False
+
+def run_solver(algorithm: str, mode: str, board: list[list[int]], budget: SearchBudget, timing: bool = False,
+               trace: bool = False, checkpoint: str | None = None,
+               checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, time_slice: float = 0,
+               solver_options: dict | None = None) -> dict:
+    """
+    With a checkpoint path, the search resumes from the file there if it holds
+    this board's search, saves to it every checkpoint_interval seconds, and
+    after time_slice seconds (0: never) saves and stops with status suspended.
+    The file is removed once the search finishes or fails; a search stopped by
+    its budget keeps its last checkpoint.
+    """
+    traced = None
+    if trace:
+        tracemalloc.start()
+    try:
+        solver, resumed = start_solver(algorithm, mode, board, budget, timing, checkpoint, solver_options)
+        iterations = 0
+        suspended = False
+        run_start = time.perf_counter()
+        next_save = run_start + checkpoint_interval
+        try:
+            while True:
+                state, move = solver.take_action()
+                if state is None and move is None:
+                    break
+                iterations += 1
+                if checkpoint is not None and iterations % CHECKPOINT_POLL_INTERVAL == 0 and not solver.solution_found:
+                    now = time.perf_counter()
+                    if time_slice and now - run_start >= time_slice:
+                        save_checkpoint(solver, checkpoint)
+                        suspended = True
+                        break
+                    if now >= next_save:
+                        save_checkpoint(solver, checkpoint)
+                        next_save = time.perf_counter() + checkpoint_interval
+            if trace:
+                # While the search still holds on to everything.
+                traced = traced_memory()
+        finally:
+            solver.close()
+
+        solution = solver.get_final_path() if solver.solution_found else None
+        if solution is not None:
+            status = "finished" if replays(mode, board, solution) else "invalid"
+        elif suspended:
+            status = "suspended"
+        else:
+            status = solver.stop_reason or "failed"
+        if checkpoint is not None and status in ("finished", "failed") and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        stats = solver.get_stats().as_dict()
+        del stats["frontier"]
+        record = {"status": status,
+                  "solution": [list(move) for move in solution] if solution is not None else None,
+                  "steps": iterations, **stats, "memory_usage": solver.memory_usage()}
+        if solver.error is not None:
+            record["error"] = solver.error
+        if checkpoint is not None:
+            record["resumed"] = resumed
+        if trace:
+            record["traced"] = traced
+        return record
+    except Exception as e:
+        return {"status": "error", "error": repr(e), "solution": None, "steps": None}
+    finally:
+        if trace:
+            tracemalloc.stop()
+
+def _solve_task(task: tuple) -> dict:
+    return solve_map(*task)
+
+def load_maps(path: str) -> dict[str, list]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Solve every board of a puzzle catalogue without the GUI, one JSON line per board.")
+    parser.add_argument("--mode", choices=MODES, action="append",
+                        help="mode to solve (repeatable, default: all)")
+    parser.add_argument("--maps", help="maps file to solve instead of " + maps_path("<mode>") + " (needs a single --mode)")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), default="astar")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="boards solved at once (default: one per CPU)")
+    parser.add_argument("--max-expansions", type=int, default=DEFAULT_MAX_EXPANSIONS,
+                        help="nodes a search may expand before it stops with status expansion_limit (0: no limit)")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="seconds a search may run before it stops with status time_limit (0: no limit)")
+    parser.add_argument("--memory-limit", type=int, default=DEFAULT_MAX_MEMORY_MB, metavar="MB",
+                        help="estimated memory a search may hold before it stops with status memory_limit (0: no limit)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="trace allocations and record the peak and the largest allocation sites (slow)")
+    parser.add_argument("--timing", action="store_true",
+                        help="also record the time spent in move generation, hashing, the heuristic and the queue")
+    parser.add_argument("--checkpoint-dir", metavar="DIR",
+                        help="save each search's progress in DIR and carry on from it on the next run")
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL, metavar="SECONDS",
+                        help=f"seconds between checkpoints (default: {DEFAULT_CHECKPOINT_INTERVAL})")
+    parser.add_argument("--slice", type=float, default=0, metavar="SECONDS",
+                        help="seconds each board runs before it is checkpointed and stops with status suspended (needs --checkpoint-dir)")
+    parser.add_argument("--listen", metavar="HOST:PORT",
+                        help="serve hda searches on HOST:PORT to nodes started with `python -m src.algorithms.hda` instead of local workers")
+    parser.add_argument("--nodes", type=int, help="nodes each served search waits for (default: --processes)")
+    parser.add_argument("--authkey", help="key the nodes must connect with (needs --listen)")
+    parser.add_argument("-o", "--output", help="file to write the JSON lines to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    modes = args.mode or list(MODES)
+    if args.maps and len(modes) != 1:
+        parser.error("--maps needs exactly one --mode")
+    if args.slice and not args.checkpoint_dir:
+        parser.error("--slice needs --checkpoint-dir")
+    solver_options = None
+    if args.listen:
+        if not issubclass(ALGORITHMS[args.algorithm], HDASolver):
+            parser.error("--listen needs an hda algorithm")
+        if not args.authkey:
+            parser.error("--listen needs --authkey")
+        solver_options = {"processes": args.nodes or args.processes, "listen": parse_address(args.listen),
+                          "authkey": args.authkey.encode()}
+    elif args.nodes or args.authkey:
+        parser.error("--nodes and --authkey need --listen")
+    if args.checkpoint_dir:
+        if not ALGORITHMS[args.algorithm].resumable:
+            parser.error(f"{args.algorithm} searches cannot be checkpointed")
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+
+    budget = SearchBudget.from_options(args.max_expansions, args.max_seconds, args.memory_limit)
+    tasks = []
+    for mode in modes:
+        for pieces, boards in load_maps(args.maps or maps_path(mode)).items():
+            for index, board in enumerate(boards):
+                tasks.append((args.algorithm, mode, pieces, index, board, budget, args.timing, args.tracemalloc,
+                              args.checkpoint_dir, args.checkpoint_interval, args.slice, solver_options))
+
+    # Solvers that start their own processes cannot run inside pool workers; they get the machine one board at a time.
+    if ALGORITHMS[args.algorithm].uses_processes or args.processes <= 1:
+        pool = None
+        results = map(_solve_task, tasks)
+    else:
+        pool = multiprocessing.Pool(args.processes)
+        results = pool.imap(_solve_task, tasks)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    counts: dict[str, int] = {}
+    start_t = time.perf_counter()
+    try:
+        for record in results:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if out is not sys.stdout:
+            out.close()
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"{len(tasks)} boards in {time.perf_counter() - start_t:.1f}s: {summary}", file=sys.stderr)
+    return 0 if counts.get("finished", 0) == len(tasks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,94 +1,127 @@
+import array
 import heapq
-import copy
 
 from src.entities.chess import ChessPuzzle
 from src.algorithms.algorithm import ChessSolver
-
-class AStarNode:
-    def __init__(self, state, g, h, parent=None, action=None):
-        self.state = {
-            "board": [row[:] for row in state["board"]],
-            "turn": state["turn"],
-            "move_count": state["move_count"].copy() if state["move_count"] else None
-        }
-        self.g = g
-        self.h = h
-        self.f = g + h
-        self.parent = parent
-        self.action = action
-
-    def __lt__(self, other):
-        if self.f == other.f:
-            return self.g > other.g
-        return self.f < other.f
+from src.algorithms.budget import SearchBudget
+from src.algorithms.memory import heap_nbytes
 
 class AStarSolver(ChessSolver):
-    def __init__(self, env: ChessPuzzle):
-        super().__init__(env)
+    resumable = True
+
+    def __init__(self, env: ChessPuzzle, timing: bool = False, budget: SearchBudget | None = None):
+        super().__init__(env, timing, budget)
 
         start_state = env.get_state()
         env.set_state(start_state)
         start_h = env.calculate_heuristic()
-        start_node = AStarNode(start_state, 0, start_h)
+        start_node = self.arena.add(start_state, h=start_h)
+        # Heap entries are (f, -g, node): lowest f first, deeper nodes first on ties.
         self.pq = []
-        heapq.heappush(self.pq, start_node)
-        self.visited = set()
-        self.visited.add(self.hash_state(start_state))
+        heapq.heappush(self.pq, (start_h, 0, start_node))
+        self.visited = self.keys.new_set()
+        self.visited.add(self.keys.key(start_state))
         
         self.current_parent_node = None 
+        self.current_parent_state = None
+        self.current_parent_key = None
         self.pending_moves = []       
         self.solution_found = False
         self.final_node = None
+        if self.probe_root(start_node) is False:
+            self.pq = []
+
+    def frontier_size(self) -> int:
+        return len(self.pq)
+
+    def frontier_nbytes(self) -> int:
+        return heap_nbytes(self.pq)
+
+    def clear_frontier(self) -> None:
+        self.pq = []
+
+    def checkpoint_state(self) -> tuple[dict, dict]:
+        meta, sections = super().checkpoint_state()
+        sections["frontier"] = array.array('i', [node for _, _, node in self.pq])
+        return meta, sections
+
+    def restore_checkpoint(self, meta: dict, sections: dict) -> None:
+        super().restore_checkpoint(meta, sections)
+        g, h = self.arena.g, self.arena.h
+        # Saved in heap order, so the rebuilt entries are still a heap.
+        self.pq = [(g[node] + h[node], -g[node], node) for node in sections["frontier"]]
 
-    def hash_state(self, state):
-        flat_board = tuple(item for row in state["board"] for item in row)
-        
-        turn = state["turn"]
-        move_items = None
-        if state.get("move_count") is not None:
-            move_items = frozenset(
-                (k, v) for k, v in state["move_count"].items() if v > 0
-            )
-            
-        return (flat_board, turn, move_items)
-    
     def take_action(self):
-        if self.solution_found or (not self.pq and not self.pending_moves and not self.current_parent_node):
+        if self.solution_found or (not self.pq and not self.pending_moves and self.current_parent_node is None):
             return None, None 
 
+        stats = self.stats
+        clock = stats.clock
+        times = stats.times
         while True:
-            if self.current_parent_node and self.pending_moves:
+            if self.current_parent_node is not None and self.pending_moves:
                 move = self.pending_moves.pop(0)
-                self.env.set_state(self.current_parent_node.state)
-                state_before_move = self.env.get_state()
-                self.env.step(move)
-                child_state = self.env.get_state()
-                child_hash = self.hash_state(child_state)
-                if child_hash in self.visited:
+                state_before_move = self.current_parent_state
+                t0 = clock()
+                if not self.env.push(move):
+                    continue
+                stats.generated += 1
+                t1 = clock()
+                child_key = self.keys.child_key(self.current_parent_key, state_before_move, move, self.env)
+                seen = child_key in self.visited
+                t2 = clock()
+                times["movegen"] += t1 - t0
+                times["hashing"] += t2 - t1
+                if seen:
+                    stats.duplicates += 1
+                    self.env.pop()
                     continue 
+                child_state = self.env.get_state()
+                verdict = self.env.probe_tablebase(child_state)
+                if verdict is False:
+                    self.env.pop()
+                    self.visited.add(child_key)
+                    continue
                 child_h = self.env.calculate_heuristic()
+                t3 = clock()
+                times["heuristic"] += t3 - t2
                 
-                child_node = AStarNode(
-                    child_state, 
-                    g=self.current_parent_node.g + 1, 
-                    h=child_h, 
-                    parent=self.current_parent_node, 
-                    action=move
-                )
+                child_g = self.arena.g[self.current_parent_node] + 1
+                child_node = self.arena.add(child_state, self.current_parent_node, move, child_g, child_h)
+                if verdict:
+                    print("Solution Found!")
+                    self.solution_found = True
+                    self.final_node = self.finish_from_tablebase(child_node)
+                    self.env.pop()
+                    return state_before_move, move
+                self.env.pop()
                 
-                heapq.heappush(self.pq, child_node)
-                self.visited.add(child_hash)
+                heapq.heappush(self.pq, (child_g + child_h, -child_g, child_node))
+                self.visited.add(child_key)
+                if len(self.pq) > stats.frontier_peak:
+                    stats.frontier_peak = len(self.pq)
+                times["queue"] += clock() - t3
                 return state_before_move, move
             if not self.pq:
                 return None, None
-            best_node = heapq.heappop(self.pq)
-            if best_node.h == 0:
+            if stats.expanded >= self.next_budget_check and self.over_budget():
+                return None, None
+            t0 = clock()
+            _, _, best_node = heapq.heappop(self.pq)
+            t1 = clock()
+            times["queue"] += t1 - t0
+            if self.arena.h[best_node] == 0:
                 print("Solution Found!")
                 self.solution_found = True
                 self.final_node = best_node
                 return None, None 
 
             self.current_parent_node = best_node
-            self.env.set_state(best_node.state)
+            self.current_parent_state = self.arena.state(best_node)
+            self.current_parent_key = self.keys.key(self.current_parent_state)
+            t2 = clock()
+            self.env.set_state(self.current_parent_state)
             self.pending_moves = self.env.board.get_all_valid_moves()
-            
\ No newline at end of file
+            stats.expanded += 1
+            times["hashing"] += t2 - t1
+            times["movegen"] += clock() - t2
@@ -1,29 +1,29 @@
+import array
 import collections
-import copy
 
 from src.entities.chess import ChessPuzzle
 from src.algorithms.algorithm import ChessSolver
-
-class BFSNode:
-    def __init__(self, state, parent=None, action=None):
-        self.state = copy.deepcopy(state)
-        self.parent = parent
-        self.action = action
+from src.algorithms.budget import SearchBudget
+from src.algorithms.memory import node_list_nbytes
 
 class BFSSolver(ChessSolver):
-    def __init__(self, env: ChessPuzzle):
-        super().__init__(env)
+    resumable = True
+
+    def __init__(self, env: ChessPuzzle, timing: bool = False, budget: SearchBudget | None = None):
+        super().__init__(env, timing, budget)
 
         start_state = env.get_state()
         env.set_state(start_state)
         
-        start_node = BFSNode(start_state)
+        start_node = self.arena.add(start_state)
         self.queue = collections.deque([start_node])
-        self.visited = set()
+        self.visited = self.keys.new_set()
         
-        self.visited.add(self.hash_state(start_state))
+        self.visited.add(self.keys.key(start_state))
         
         self.current_parent_node = None 
+        self.current_parent_state = None
+        self.current_parent_key = None
         self.pending_moves = []       
         self.solution_found = False
         self.final_node = None
@@ -31,55 +31,93 @@ class BFSSolver(ChessSolver):
         if self.env.calculate_heuristic(start_state) == 0:
             self.solution_found = True
             self.final_node = start_node
+        elif self.probe_root(start_node) is False:
+            self.queue.clear()
+
+    def frontier_size(self) -> int:
+        return len(self.queue)
+
+    def frontier_nbytes(self) -> int:
+        return node_list_nbytes(self.queue)
+
+    def clear_frontier(self) -> None:
+        self.queue.clear()
+
+    def checkpoint_state(self) -> tuple[dict, dict]:
+        meta, sections = super().checkpoint_state()
+        sections["frontier"] = array.array('i', self.queue)
+        return meta, sections
+
+    def restore_checkpoint(self, meta: dict, sections: dict) -> None:
+        super().restore_checkpoint(meta, sections)
+        self.queue = collections.deque(sections["frontier"])
 
-    def hash_state(self, state):
-        flat_board = tuple(item for row in state["board"] for item in row)
-        
-        turn = state["turn"]
-        move_items = None
-        if state.get("move_count") is not None:
-            move_items = frozenset(
-                (k, v) for k, v in state["move_count"].items() if v > 0
-            )
-            
-        return (flat_board, turn, move_items)
-    
     def take_action(self):
-        if self.solution_found or (not self.queue and not self.pending_moves and not self.current_parent_node):
+        if self.solution_found or (not self.queue and not self.pending_moves and self.current_parent_node is None):
             return None, None 
 
+        stats = self.stats
+        clock = stats.clock
+        times = stats.times
         while True:
-            if self.current_parent_node and self.pending_moves:
+            if self.current_parent_node is not None and self.pending_moves:
                 move = self.pending_moves.pop(0)
-
-                self.env.set_state(self.current_parent_node.state)
-                state_before_move = self.env.get_state()
-                self.env.step(move)
+                state_before_move = self.current_parent_state
+                t0 = clock()
+                if not self.env.push(move):
+                    continue
+                stats.generated += 1
+                t1 = clock()
                 
-                child_state = self.env.get_state()
-                child_hash = self.hash_state(child_state)
+                child_key = self.keys.child_key(self.current_parent_key, state_before_move, move, self.env)
+                seen = child_key in self.visited
+                t2 = clock()
+                times["movegen"] += t1 - t0
+                times["hashing"] += t2 - t1
                 
-                if child_hash in self.visited:
+                if seen:
+                    stats.duplicates += 1
+                    self.env.pop()
                     continue
+                child_state = self.env.get_state()
                 
-                self.visited.add(child_hash)
-                child_node = BFSNode(
-                    child_state, 
-                    parent=self.current_parent_node, 
-                    action=move
-                )
+                self.visited.add(child_key)
+                verdict = self.env.probe_tablebase(child_state)
+                if verdict is False:
+                    self.env.pop()
+                    continue
+                child_node = self.arena.add(child_state, self.current_parent_node, move)
+                final_node = self.finish_from_tablebase(child_node) if verdict else child_node
+                solved = verdict or self.env.calculate_heuristic(child_state) == 0
+                t3 = clock()
+                times["heuristic"] += t3 - t2
+                self.env.pop()
                 self.queue.append(child_node)
-                if self.env.calculate_heuristic(child_state) == 0:
+                if len(self.queue) > stats.frontier_peak:
+                    stats.frontier_peak = len(self.queue)
+                times["queue"] += clock() - t3
+                if solved:
                     print("Solution Found!")
                     self.solution_found = True
-                    self.final_node = child_node
+                    self.final_node = final_node
                     return state_before_move, move
 
                 return state_before_move, move
             if not self.queue:
                 return None, None 
+            if stats.expanded >= self.next_budget_check and self.over_budget():
+                return None, None
+            t0 = clock()
             best_node = self.queue.popleft()
+            t1 = clock()
             
             self.current_parent_node = best_node
-            self.env.set_state(best_node.state)
-            self.pending_moves = self.env.board.get_all_valid_moves()
\ No newline at end of file
+            self.current_parent_state = self.arena.state(best_node)
+            self.current_parent_key = self.keys.key(self.current_parent_state)
+            t2 = clock()
+            self.env.set_state(self.current_parent_state)
+            self.pending_moves = self.env.board.get_all_valid_moves()
+            stats.expanded += 1
+            times["queue"] += t1 - t0
+            times["hashing"] += t2 - t1
+            times["movegen"] += clock() - t2
@@ -1,79 +1,207 @@
-import copy
+import array
+
 from src.entities.chess import ChessPuzzle
 from src.algorithms.algorithm import ChessSolver
-
-class DFSNode:
-    def __init__(self, state, parent=None, action=None):
-        self.state = copy.deepcopy(state)
-        self.parent = parent
-        self.action = action
+from src.algorithms.budget import SearchBudget
+from src.algorithms.dead_states import dead_states
+from src.algorithms.memory import hash_set_nbytes, node_list_nbytes
+from src.entities.symmetry import symmetric_hashes
 
 class DFSSolver(ChessSolver):   
-    def __init__(self, env: ChessPuzzle):
-        super().__init__(env)
+    resumable = True
+
+    def __init__(self, env: ChessPuzzle, timing: bool = False, budget: SearchBudget | None = None):
+        super().__init__(env, timing, budget)
 
         start_state = env.get_state()
         env.set_state(start_state)
+
+        # Positions proven unsolvable, shared with every other search in this mode.
+        self.dead = dead_states(env.mode)
+        # Per node: Zobrist hash, and children not yet proven dead (plus one while the node is being expanded).
+        self.node_hashes = array.array('Q')
+        self.pending = array.array('i')
+        # Hash of an already visited position -> parents waiting on its verdict.
+        self.waiting: dict[int, list[int]] = {}
         
-        start_node = DFSNode(start_state)
+        start_node = self.add_node(start_state, -1, None, env.get_hash())
         self.stack = [start_node] 
-        self.visited = set()
-        self.visited.add(self.hash_state(start_state))
+        self.visited = self.keys.new_set()
+        self.visited.add(self.keys.key(start_state))
         
         self.current_parent_node = None 
+        self.current_parent_state = None
+        self.current_parent_key = None
         self.pending_moves = []       
         self.solution_found = False
         self.final_node = None
         if self.env.calculate_heuristic(start_state) == 0:
             self.solution_found = True
             self.final_node = start_node
+        elif env.get_hash() in self.dead or self.probe_root(start_node) is False:
+            self.stack = []
+
+    def add_node(self, state, parent: int, move, node_hash: int) -> int:
+        node = self.arena.add(state, parent, move)
+        self.node_hashes.append(node_hash)
+        self.pending.append(0)
+        return node
+
+    def finish_expansion(self, node: int) -> None:
+        self.pending[node] -= 1
+        if self.pending[node] == 0:
+            self.mark_dead(node)
+
+    def image_hashes(self, node: int) -> list[int]:
+        """Hashes of the node's position and, from a symmetric root, of its images, which are just as dead."""
+        if self.keys.symmetric:
+            return symmetric_hashes(self.arena.state(node), self.keys.group)
+        return [self.node_hashes[node]]
+
+    def mark_dead(self, node: int) -> None:
+        """Records a node whose children are all dead, then every parent that this leaves with none alive."""
+        doomed = [node]
+        while doomed:
+            node = doomed.pop()
+            parents = []
+            for node_hash in self.image_hashes(node):
+                self.dead.add(node_hash)
+                parents += self.waiting.pop(node_hash, [])
+            if self.arena.parents[node] != -1:
+                parents.append(self.arena.parents[node])
+            for parent in parents:
+                self.pending[parent] -= 1
+                if self.pending[parent] == 0:
+                    doomed.append(parent)
+
+    def frontier_size(self) -> int:
+        return len(self.stack)
+
+    def frontier_nbytes(self) -> int:
+        return node_list_nbytes(self.stack)
+
+    def clear_frontier(self) -> None:
+        self.stack = []
+
+    def checkpoint_state(self) -> tuple[dict, dict]:
+        meta, sections = super().checkpoint_state()
+        sections["frontier"] = array.array('i', self.stack)
+        sections["node_hashes"] = self.node_hashes
+        sections["pending"] = self.pending
+        # waiting as its hashes, how many parents each has, and the parents back to back.
+        sections["waiting_hashes"] = array.array('Q', self.waiting)
+        sections["waiting_counts"] = array.array('i', map(len, self.waiting.values()))
+        sections["waiting_parents"] = array.array('i', [parent for parents in self.waiting.values() for parent in parents])
+        # The mode's dead states, oldest first, so the ones proven here are not searched again.
+        sections["dead"] = array.array('Q', self.dead.entries)
+        return meta, sections
+
+    def restore_checkpoint(self, meta: dict, sections: dict) -> None:
+        super().restore_checkpoint(meta, sections)
+        self.stack = list(sections["frontier"])
+        self.node_hashes = sections["node_hashes"]
+        self.pending = sections["pending"]
+        self.waiting = {}
+        parents = iter(sections["waiting_parents"])
+        for node_hash, count in zip(sections["waiting_hashes"], sections["waiting_counts"]):
+            self.waiting[node_hash] = [next(parents) for _ in range(count)]
+        for node_hash in sections["dead"]:
+            self.dead.add(node_hash)
+
+    def memory_usage(self) -> dict[str, int]:
+        usage = super().memory_usage()
+        columns = (self.node_hashes, self.pending)
+        usage["arena"] += sum(column.itemsize * len(column) for column in columns)
+        usage["waiting"] = hash_set_nbytes(self.waiting) + sum(node_list_nbytes(parents) for parents in self.waiting.values())
+        # Shared with the mode's other searches and bounded by DEAD_STATE_LIMIT, but held all the same.
+        usage["dead_states"] = hash_set_nbytes(self.dead.entries)
+        return usage
 
-    def hash_state(self, state):
-        flat_board = tuple(item for row in state["board"] for item in row)
-        
-        turn = state["turn"]
-        move_items = None
-        if state.get("move_count") is not None:
-            move_items = frozenset(
-                (k, v) for k, v in state["move_count"].items() if v > 0
-            )
-            
-        return (flat_board, turn, move_items)
-    
     def take_action(self):
-        if self.solution_found or (not self.stack and not self.pending_moves and not self.current_parent_node):
+        if self.solution_found or (not self.stack and not self.pending_moves and self.current_parent_node is None):
             return None, None 
 
+        stats = self.stats
+        clock = stats.clock
+        times = stats.times
         while True:
-            if self.current_parent_node and self.pending_moves:
+            if self.current_parent_node is not None and self.pending_moves:
                 move = self.pending_moves.pop(0)
-                self.env.set_state(self.current_parent_node.state)
-                state_before_move = self.env.get_state()
-                self.env.step(move)
+                state_before_move = self.current_parent_state
+                t0 = clock()
+                if not self.env.push(move):
+                    continue
+                stats.generated += 1
+                t1 = clock()
                 
+                child_key = self.keys.child_key(self.current_parent_key, state_before_move, move, self.env)
+                child_hash = self.env.get_hash()
+                dead = child_hash in self.dead
+                seen = not dead and child_key in self.visited
+                t2 = clock()
+                times["movegen"] += t1 - t0
+                times["hashing"] += t2 - t1
+
+                if dead:
+                    stats.duplicates += 1
+                    self.env.pop()
+                    continue
+                if seen:
+                    # A transposition still being searched: this parent cannot be dead before it is.
+                    stats.duplicates += 1
+                    self.env.pop()
+                    self.waiting.setdefault(child_hash, []).append(self.current_parent_node)
+                    self.pending[self.current_parent_node] += 1
+                    continue
                 child_state = self.env.get_state()
-                child_hash = self.hash_state(child_state)
-                
-                if child_hash in self.visited:
+                self.visited.add(child_key)
+                verdict = self.env.probe_tablebase(child_state)
+                if verdict is False:
+                    self.env.pop()
+                    self.dead.add(child_hash)
                     continue
-                self.visited.add(child_hash)
                 
-                child_node = DFSNode(child_state, parent=self.current_parent_node, action=move)
+                child_node = self.add_node(child_state, self.current_parent_node, move, child_hash)
+                final_node = self.finish_from_tablebase(child_node) if verdict else child_node
+                solved = verdict or self.env.calculate_heuristic(child_state) == 0
+                t3 = clock()
+                times["heuristic"] += t3 - t2
+                self.env.pop()
+                self.pending[self.current_parent_node] += 1
                 self.stack.append(child_node)
+                if len(self.stack) > stats.frontier_peak:
+                    stats.frontier_peak = len(self.stack)
+                times["queue"] += clock() - t3
 
-                if self.env.calculate_heuristic(child_state) == 0:
+                if solved:
                     print("DFS Solution Found!")
                     self.solution_found = True
-                    self.final_node = child_node
+                    self.final_node = final_node
                     return state_before_move, move
 
                 return state_before_move, move
 
+            if self.current_parent_node is not None:
+                self.finish_expansion(self.current_parent_node)
+                self.current_parent_node = None
+
             if not self.stack:
                 return None, None
+            if stats.expanded >= self.next_budget_check and self.over_budget():
+                return None, None
 
+            t0 = clock()
             next_node = self.stack.pop()
+            t1 = clock()
             
             self.current_parent_node = next_node
-            self.env.set_state(next_node.state)
-            self.pending_moves = self.env.board.get_all_valid_moves()
\ No newline at end of file
+            self.current_parent_state = self.arena.state(next_node)
+            self.current_parent_key = self.keys.key(self.current_parent_state)
+            self.pending[next_node] = 1
+            t2 = clock()
+            self.env.set_state(self.current_parent_state)
+            self.pending_moves = self.env.board.get_all_valid_moves()
+            stats.expanded += 1
+            times["queue"] += t1 - t0
+            times["hashing"] += t2 - t1
+            times["movegen"] += clock() - t2
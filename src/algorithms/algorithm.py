@@ -1,17 +1,178 @@
+import array
+import sys
+import time
+
+from src.algorithms.arena import NodeArena, pack_move, unpack_move
+from src.algorithms.budget import SearchBudget
+from src.algorithms.memory import visited_nbytes
+from src.algorithms.state_index import StateKeys
+from src.algorithms.stats import SearchStats
+
+# Expansions between full budget checks, which sample the memory estimate and the clock.
+BUDGET_CHECK_INTERVAL = 64
+
 class ChessSolver:
-    def __init__(self, env):
+    # Solvers that start their own worker processes are not run inside a SearchWorker.
+    uses_processes: bool = False
+    # Replaced by the solvers that keep a visited set.
+    visited = ()
+    # Single-process solvers whose whole search can be saved and resumed, see checkpoint_state.
+    resumable: bool = False
+
+    def __init__(self, env, timing: bool = False, budget: SearchBudget | None = None):
         self.env = env
+        self.arena = NodeArena()
         self.final_node = None
-        
+        self.keys = StateKeys(env.get_state())
+        # timing=True also splits the search time into phases, see SearchStats.
+        self.stats = SearchStats(timing)
+        self.budget = budget if budget is not None else SearchBudget()
+        self.start_t = time.perf_counter()
+        # Expansion count at which over_budget is next called.
+        self.next_budget_check = 0
+        # The budget's limit that ended the search early (see STOP_REASONS), or
+        # "error" when one of its worker processes failed; None otherwise.
+        self.stop_reason: str | None = None
+        # What went wrong, for stop_reason "error".
+        self.error: str | None = None
+
+    def finish_from_tablebase(self, node: int) -> int:
+        """
+        Adds the tablebase's winning line from `node`, whose position must be the
+        one currently on the board, to the arena and returns the final node.
+        """
+        line = self.env.tablebase_line()
+        for move in line:
+            self.env.push(move)
+            node = self.arena.add(self.env.get_state(), node, move, self.arena.g[node] + 1)
+        for _ in line:
+            self.env.pop()
+        return node
+
+    def probe_root(self, start_node: int) -> bool | None:
+        """Settles a start position small enough for the tablebase; False means unsolvable."""
+        verdict = self.env.probe_tablebase()
+        if verdict:
+            self.solution_found = True
+            self.final_node = self.finish_from_tablebase(start_node)
+        return verdict
+
+    def frontier_size(self) -> int:
+        return 0
+
+    def visited_size(self) -> int:
+        return len(self.visited)
+
+    def frontier_nbytes(self) -> int:
+        return 0
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Estimated bytes held by each of the search's structures, from their
+        lengths and the sizes of the objects in them, so it is cheap to call.
+        Interpreter overhead and short-lived temporaries are not included.
+        """
+        return {"arena": self.arena.nbytes(), "visited": visited_nbytes(self.visited), "frontier": self.frontier_nbytes()}
+
+    def sample_memory(self) -> int:
+        stats = self.stats
+        stats.memory = sum(self.memory_usage().values())
+        if stats.memory > stats.memory_peak:
+            stats.memory_peak = stats.memory
+        return stats.memory
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_t
+
+    def over_budget(self) -> bool:
+        """
+        Checks the whole budget, sampling the memory estimate. The solvers call it
+        before an expansion once stats.expanded reaches next_budget_check, which
+        is every BUDGET_CHECK_INTERVAL expansions and exactly at max_expansions.
+        """
+        expanded = self.stats.expanded
+        reason = self.budget.exceeded(expanded, self.elapsed(), self.sample_memory())
+        if reason is not None:
+            self.stop(reason)
+            return True
+        self.next_budget_check = expanded + BUDGET_CHECK_INTERVAL
+        if self.budget.max_expansions is not None:
+            self.next_budget_check = min(self.next_budget_check, self.budget.max_expansions)
+        return False
+
+    def stop(self, reason: str) -> None:
+        """Ends the search early: the frontier is dropped, so take_action only returns (None, None) from then on."""
+        self.stop_reason = reason
+        self.clear_frontier()
+        self.pending_moves = []
+        self.current_parent_node = None
+
+    def fail(self, error: str) -> None:
+        """Ends the search with stop_reason "error", for a worker process that raised or died."""
+        print(f"{type(self).__name__} failed: {error}", file=sys.stderr)
+        self.error = error
+        self.stop("error")
+
+    def clear_frontier(self) -> None:
+        pass
+
+    def checkpoint_state(self) -> tuple[dict, dict]:
+        """
+        The search so far as (meta, sections): JSON-friendly values and flat
+        arrays by name, written out by src.algorithms.checkpoint. Only valid
+        between take_action calls; resumable solvers add their frontier.
+        """
+        arena = self.arena
+        meta = {"stats": self.stats.as_dict(), "elapsed": self.elapsed(),
+                "parent": self.current_parent_node if self.current_parent_node is not None else -1,
+                "visited": len(self.visited)}
+        sections = {"states": arena.states, "parents": arena.parents, "moves": arena.moves, "g": arena.g, "h": arena.h,
+                    "visited": self.visited.bits if self.keys.dense else array.array('Q', self.visited),
+                    "pending_moves": array.array('H', map(pack_move, self.pending_moves))}
+        return meta, sections
+
+    def restore_checkpoint(self, meta: dict, sections: dict) -> None:
+        """Replaces the fresh search built by __init__ with a saved one from checkpoint_state."""
+        arena = self.arena
+        arena.states = sections["states"]
+        arena.parents, arena.moves, arena.g, arena.h = (sections[name] for name in ("parents", "moves", "g", "h"))
+        if self.keys.dense:
+            self.visited.bits = sections["visited"]
+            self.visited.count = meta["visited"]
+        else:
+            self.visited = set(sections["visited"])
+        self.stats.restore(meta["stats"])
+        # Time limits cover the whole search, not just this run of it.
+        self.start_t = time.perf_counter() - meta["elapsed"]
+
+        self.pending_moves = [unpack_move(code) for code in sections["pending_moves"]]
+        if meta["parent"] == -1:
+            self.current_parent_node = None
+            return
+        # Mid-expansion: the remaining moves are played from the parent's position.
+        self.current_parent_node = meta["parent"]
+        self.current_parent_state = arena.state(self.current_parent_node)
+        self.current_parent_key = self.keys.key(self.current_parent_state)
+        self.env.set_state(self.current_parent_state)
+
+    def get_stats(self) -> SearchStats:
+        """The search's counters, with the frontier, visited and memory sizes brought up to date."""
+        stats = self.stats
+        stats.frontier = self.frontier_size()
+        if stats.frontier > stats.frontier_peak:
+            stats.frontier_peak = stats.frontier
+        stats.visited = self.visited_size()
+        self.sample_memory()
+        return stats
+
+    def close(self) -> None:
+        """Releases anything the search holds on to; called when a search ends or is cancelled."""
+        pass
+
     def take_action(self):
         pass
     
     def get_final_path(self):
-        if not self.final_node:
+        if self.final_node is None:
             return []
-        path = []
-        curr = self.final_node
-        while curr.parent:
-            path.append(curr.action)
-            curr = curr.parent
-        return path[::-1]
+        return self.arena.path(self.final_node)
@@ -0,0 +1,54 @@
+import array
+
+from src.entities.state import State, STATE_SIZE
+
+def pack_move(move: tuple[int, int, int, int]) -> int:
+    """16-bit move: from square in the high 6 bits, to square in the low 6 bits."""
+    return (move[0] * 8 + move[1]) << 6 | (move[2] * 8 + move[3])
+
+def unpack_move(code: int) -> tuple[int, int, int, int]:
+    from_square, to_square = code >> 6, code & 63
+    return (from_square >> 3, from_square & 7, to_square >> 3, to_square & 7)
+
+class NodeArena:
+    """
+    Search nodes stored column-wise in flat arrays instead of one object per node.
+    A node is just its index; frontiers hold these ints and paths are rebuilt by
+    following parent indices. States are packed back to back, STATE_SIZE bytes each,
+    so a node costs about 75 bytes.
+    """
+    def __init__(self):
+        self.states = bytearray()
+        self.parents = array.array('i')
+        self.moves = array.array('H')
+        self.g = array.array('H')
+        self.h = array.array('i')
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add(self, state: State, parent: int = -1, move: tuple[int, int, int, int] | None = None, g: int = 0, h: int = 0) -> int:
+        self.states += state
+        self.parents.append(parent)
+        self.moves.append(pack_move(move) if move is not None else 0)
+        self.g.append(g)
+        self.h.append(h)
+        return len(self.parents) - 1
+
+    def state(self, index: int) -> State:
+        return bytes(self.states[index * STATE_SIZE:(index + 1) * STATE_SIZE])
+
+    def move(self, index: int) -> tuple[int, int, int, int]:
+        return unpack_move(self.moves[index])
+
+    def path(self, index: int) -> list[tuple[int, int, int, int]]:
+        """Moves from the root to the given node."""
+        path = []
+        while self.parents[index] != -1:
+            path.append(self.move(index))
+            index = self.parents[index]
+        return path[::-1]
+
+    def nbytes(self) -> int:
+        columns = (self.parents, self.moves, self.g, self.h)
+        return len(self.states) + sum(column.itemsize * len(column) for column in columns)
@@ -0,0 +1,47 @@
+# Defaults shared by the game settings and the command-line tools.
+DEFAULT_MAX_EXPANSIONS = 200_000
+DEFAULT_MAX_SECONDS = 120
+DEFAULT_MAX_MEMORY_MB = 1024
+
+# stop_reason values of a search that ran out of budget, one per limit.
+STOP_REASONS = ("expansion_limit", "time_limit", "memory_limit")
+
+class SearchBudget:
+    """
+    How much work one search may do; None leaves a limit off.
+
+    max_expansions counts expanded nodes (SearchStats.expanded), max_seconds the
+    wall time since the solver was created and max_memory the estimated bytes
+    the search holds (ChessSolver.memory_usage). The solvers check the budget
+    before expanding a node, and a search past it stops with stop_reason set to
+    the limit it hit.
+    """
+    __slots__ = ("max_expansions", "max_seconds", "max_memory")
+
+    def __init__(self, max_expansions: int | None = None, max_seconds: float | None = None, max_memory: int | None = None):
+        self.max_expansions = max_expansions
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+
+    @classmethod
+    def from_options(cls, max_expansions: int = 0, max_seconds: float = 0, max_memory_mb: int = 0) -> "SearchBudget":
+        """Budget from user-facing values, where 0 means no limit and memory is in MB."""
+        return cls(max_expansions or None, max_seconds or None, max_memory_mb << 20 or None)
+
+    def exceeded(self, expanded: int, seconds: float, memory: int | None = None) -> str | None:
+        """The stop reason for a search at these totals, or None while it is within budget."""
+        if self.max_expansions is not None and expanded >= self.max_expansions:
+            return "expansion_limit"
+        if self.max_seconds is not None and seconds >= self.max_seconds:
+            return "time_limit"
+        if self.max_memory is not None and memory is not None and memory > self.max_memory:
+            return "memory_limit"
+        return None
+
+    def share(self, parts: int) -> "SearchBudget":
+        """Budget for one of `parts` workers searching side by side: an equal share of the memory, the rest as is."""
+        return SearchBudget(self.max_expansions, self.max_seconds,
+                            self.max_memory // parts if self.max_memory is not None else None)
+
+    def as_dict(self) -> dict:
+        return {"max_expansions": self.max_expansions, "max_seconds": self.max_seconds, "max_memory": self.max_memory}
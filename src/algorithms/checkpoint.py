@@ -0,0 +1,100 @@
+import array
+import json
+import os
+import struct
+import sys
+import zlib
+
+from src.algorithms.algorithm import ChessSolver
+from src.algorithms.budget import SearchBudget
+
+# File layout: MAGIC, the header's length (u32, little-endian), the header as
+# JSON, then each section zlib-compressed in the order the header lists them.
+MAGIC = b"CKPT"
+# Bumped whenever the layout or a solver's sections change; older files are refused, not misread.
+CHECKPOINT_VERSION = 2
+# Fast, and the node columns still shrink several times over.
+COMPRESS_LEVEL = 1
+
+class CheckpointError(ValueError):
+    """A checkpoint that cannot be resumed: unreadable, from another version or machine, or of another search."""
+
+def save_checkpoint(solver: ChessSolver, path: str) -> int:
+    """
+    Writes the search's progress to `path` and returns the file's size. The
+    file is written beside it and moved into place when complete, so an
+    interrupted save leaves the previous checkpoint intact.
+    """
+    if not solver.resumable:
+        raise CheckpointError(f"{type(solver).__name__} cannot be checkpointed")
+    if solver.solution_found or solver.stop_reason is not None:
+        raise CheckpointError("the search has already ended")
+    meta, sections = solver.checkpoint_state()
+    blobs = [zlib.compress(value, COMPRESS_LEVEL) for value in sections.values()]
+    header = {
+        "version": CHECKPOINT_VERSION,
+        "byteorder": sys.byteorder,
+        "solver": type(solver).__name__,
+        "mode": solver.env.mode,
+        "root": solver.arena.state(0).hex(),
+        "dense": solver.keys.dense,
+        "symmetries": list(solver.keys.group),
+        "meta": meta,
+        # (name, array typecode or None for raw bytes, compressed size)
+        "sections": [[name, getattr(value, "typecode", None), len(blob)]
+                     for (name, value), blob in zip(sections.items(), blobs)],
+    }
+    header_bytes = json.dumps(header).encode()
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+def read_checkpoint(path: str) -> tuple[dict, dict]:
+    """The header and the decompressed sections (array.array, or bytearray for raw bytes) of a checkpoint file."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise CheckpointError(f"{path} is not a checkpoint")
+        try:
+            (header_size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_size))
+        except (struct.error, ValueError) as e:
+            raise CheckpointError(f"{path} has a damaged header") from e
+        if header.get("version") != CHECKPOINT_VERSION or header.get("byteorder") != sys.byteorder:
+            raise CheckpointError(f"{path} was written by another version or machine")
+
+        sections = {}
+        for name, typecode, size in header["sections"]:
+            try:
+                data = zlib.decompress(f.read(size))
+            except zlib.error as e:
+                raise CheckpointError(f"{path} is truncated or damaged") from e
+            if typecode is None:
+                sections[name] = bytearray(data)
+            else:
+                sections[name] = array.array(typecode)
+                sections[name].frombytes(data)
+    return header, sections
+
+def load_checkpoint(solver_class: type[ChessSolver], env, path: str, timing: bool = False,
+                    budget: SearchBudget | None = None) -> ChessSolver:
+    """
+    A solver that carries on from the checkpoint at `path`. `env` must be at
+    the start position the checkpointed search began from; the budget applies
+    to the whole search, so its expansions and time include the saved ones.
+    """
+    header, sections = read_checkpoint(path)
+    if header["solver"] != solver_class.__name__ or header["mode"] != env.mode:
+        raise CheckpointError(f"{path} is a {header['mode']} {header['solver']} search")
+    if header["root"] != env.get_state().hex():
+        raise CheckpointError(f"{path} starts from another board")
+
+    solver = solver_class(env, timing, budget)
+    if header["dense"] != solver.keys.dense or header["symmetries"] != list(solver.keys.group):
+        raise CheckpointError(f"{path} keeps another kind of visited set")
+    solver.restore_checkpoint(header["meta"], sections)
+    return solver
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+# Default number of dead states remembered per mode; None keeps every one.
+DEAD_STATE_LIMIT: int | None = 200_000
+
+class DeadStateCache:
+    """
+    Zobrist hashes of positions proven unsolvable.
+
+    Bounded caches evict the least recently used hash first. Unbounded ones are a
+    plain set. Forgetting a hash is always safe: the position is just searched again.
+    """
+    def __init__(self, max_size: int | None = DEAD_STATE_LIMIT):
+        self.max_size = max_size
+        self.entries: OrderedDict[int, None] | set[int] = OrderedDict() if max_size is not None else set()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: int) -> bool:
+        if key not in self.entries:
+            return False
+        if self.max_size is not None:
+            self.entries.move_to_end(key)
+        return True
+
+    def add(self, key: int) -> None:
+        if self.max_size is None:
+            self.entries.add(key)
+            return
+        self.entries[key] = None
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+# One cache per game mode, shared by every search in the process.
+_caches: dict[str, DeadStateCache] = {}
+
+def dead_states(mode: str) -> DeadStateCache:
+    cache = _caches.get(mode)
+    if cache is None:
+        cache = _caches[mode] = DeadStateCache()
+    return cache
@@ -0,0 +1,505 @@
+import collections
+import heapq
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from multiprocessing.managers import AcquirerProxy, BaseManager, DictProxy, EventProxy, ListProxy
+
+from src.entities.chess import ChessPuzzle
+from src.algorithms.algorithm import ChessSolver
+from src.algorithms.budget import SearchBudget
+from src.algorithms.arena import pack_move
+from src.algorithms.memory import INDEX_BYTES, STATE_BYTES
+from src.algorithms.worker import pack_path, unpack_path
+from src.algorithms.stats import SearchStats
+from src.entities.symmetry import IDENTITY, canonical_transform, symmetric_hashes, transform_state
+
+# Nodes collected for one destination before the batch is sent.
+BATCH_SIZE = 64
+# Expansions between flushes of partly filled batches.
+FLUSH_INTERVAL = 32
+# Seconds between progress messages from each worker.
+PROGRESS_INTERVAL = 0.05
+# Longest a take_action call waits for worker messages, in seconds.
+POLL_INTERVAL = 0.002
+# Seconds nodes get to notice the end of a search before its manager shuts down.
+NODE_STOP_GRACE = 0.1
+# Seconds a node waits before it looks for the next search to join.
+NODE_RETRY_INTERVAL = 0.5
+
+# Open-list entries without their path: (f, -g, tie, state, path) for A*, where
+# f mostly stays in the small-int cache, and (state, g, path) for BFS.
+OPEN_ENTRY_BYTES = {
+    "astar": sys.getsizeof((0,) * 5) + 2 * INDEX_BYTES,
+    "bfs": sys.getsizeof((0,) * 3),
+}
+
+def owner_of(key: int, workers: int) -> int:
+    return key % workers
+
+def owner_key(state, state_hash: int, symmetries: tuple[int, ...]) -> int:
+    """The hash a state is assigned to a worker by: the lowest of its images' under `symmetries`."""
+    if len(symmetries) == 1:
+        return state_hash
+    return min(symmetric_hashes(state, symmetries))
+
+def worker_memory(closed: set, open_list, order: str, path_length: int) -> int:
+    """Estimated bytes of one worker's closed set and open list, taking every queued path to be `path_length` moves."""
+    entry = OPEN_ENTRY_BYTES[order] + sys.getsizeof(b"") + 2 * path_length
+    return sys.getsizeof(closed) + len(closed) * STATE_BYTES + sys.getsizeof(open_list) + len(open_list) * entry
+
+def hda_worker(rank: int, mode: str, order: str, inboxes, results, counters, lock, stop_event, timing: bool = False,
+               memory_limit: int | None = None, symmetries: tuple[int, ...] = IDENTITY) -> None:
+    """
+    One HDA* worker. It owns every state whose Zobrist hash maps to `rank`, and
+    only the owner keeps a state in its closed set, so duplicate detection is
+    exact across the whole search. Generated children are sent to their owner
+    in batches. Paths travel with the nodes, packed two bytes per move.
+
+    counters[0] counts nodes sent but not yet taken in, and counters[1 + rank]
+    is 1 while this worker is idle. The search is exhausted once every worker
+    is idle with nothing in flight; both are only changed under `lock`.
+
+    A worker whose estimated memory passes `memory_limit` stops the search and
+    reports ("memory_limit", rank); one that raises stops it and reports
+    ("error", rank, repr(exception)).
+
+    `symmetries` are the root's (StateKeys.group): a state and its images then
+    share an owner and one closed entry, the canonical image, so only one of
+    them is searched.
+
+    The queues, counters, lock and event may be manager proxies as well as
+    multiprocessing objects; see HDAManager and run_node.
+    """
+    try:
+        workers = len(inboxes)
+        env = ChessPuzzle(mode)
+        closed = set()
+        open_list = [] if order == "astar" else collections.deque()
+        outgoing = [[] for _ in range(workers)]
+        # Counters and phase times of this worker alone; the coordinator adds them up.
+        stats = SearchStats(timing)
+        clock = stats.clock
+        times = stats.times
+        tie = 0
+        last_report = time.perf_counter()
+        last_step = None
+
+        def send(destination: int) -> None:
+            batch = outgoing[destination]
+            outgoing[destination] = []
+            with lock:
+                counters[0] += len(batch)
+            inboxes[destination].put(batch)
+
+        def found(path: bytes) -> None:
+            # A last report first, so that a search ending before the first one still has counts.
+            stats.frontier = len(open_list)
+            stats.visited = len(closed)
+            stats.memory = worker_memory(closed, open_list, order, len(path) // 2)
+            stats.memory_peak = max(stats.memory_peak, stats.memory)
+            results.put(("progress", rank, stats.as_dict(), None))
+            results.put(("solution", path))
+            stop_event.set()
+
+        while not stop_event.is_set():
+            # Take in whatever has arrived; wait briefly only when there is nothing to expand.
+            while True:
+                try:
+                    batch = inboxes[rank].get_nowait() if open_list else inboxes[rank].get(timeout=0.01)
+                except queue.Empty:
+                    break
+                for state, g, path in batch:
+                    # States are compared by their bytes, not their hash.
+                    t0 = clock()
+                    key = state if len(symmetries) == 1 else transform_state(state, canonical_transform(state, symmetries))
+                    seen = key in closed
+                    t1 = clock()
+                    times["hashing"] += t1 - t0
+                    if seen:
+                        stats.duplicates += 1
+                        continue
+                    closed.add(key)
+                    if order == "astar":
+                        env.set_state(state)
+                        h = env.calculate_heuristic()
+                        t2 = clock()
+                        tie += 1
+                        heapq.heappush(open_list, (g + h, -g, tie, state, path))
+                        times["heuristic"] += t2 - t1
+                        times["queue"] += clock() - t2
+                    else:
+                        open_list.append((state, g, path))
+                        times["queue"] += clock() - t1
+                with lock:
+                    counters[1 + rank] = 0
+                    counters[0] -= len(batch)
+
+            if stop_event.is_set():
+                break
+            if not open_list:
+                for destination in range(workers):
+                    if outgoing[destination]:
+                        send(destination)
+                with lock:
+                    counters[1 + rank] = 1
+                continue
+
+            t0 = clock()
+            if order == "astar":
+                _, neg_g, _, state, path = heapq.heappop(open_list)
+                g = -neg_g
+            else:
+                state, g, path = open_list.popleft()
+            t1 = clock()
+            stats.expanded += 1
+
+            env.set_state(state)
+            moves = env.board.get_all_valid_moves()
+            times["queue"] += t1 - t0
+            times["movegen"] += clock() - t1
+            for move in moves:
+                t0 = clock()
+                env.push(move)
+                stats.generated += 1
+                child_path = path + pack_move(move).to_bytes(2, sys.byteorder)
+                last_step = (state, move)
+                if env.board.count_pieces() <= 1:
+                    found(child_path)
+                    return
+                t1 = clock()
+                verdict = env.probe_tablebase()
+                t2 = clock()
+                times["movegen"] += t1 - t0
+                times["heuristic"] += t2 - t1
+                if verdict:
+                    found(child_path + pack_path(env.tablebase_line()))
+                    return
+                if verdict is None:
+                    child_state = env.get_state()
+                    destination = owner_of(owner_key(child_state, env.get_hash(), symmetries), workers)
+                    t3 = clock()
+                    outgoing[destination].append((child_state, g + 1, child_path))
+                    if len(outgoing[destination]) >= BATCH_SIZE:
+                        send(destination)
+                    times["hashing"] += t3 - t2
+                    times["queue"] += clock() - t3
+                env.pop()
+
+            if stats.expanded % FLUSH_INTERVAL == 0:
+                for destination in range(workers):
+                    if outgoing[destination]:
+                        send(destination)
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                stats.frontier = len(open_list)
+                stats.visited = len(closed)
+                stats.memory = worker_memory(closed, open_list, order, g)
+                stats.memory_peak = max(stats.memory_peak, stats.memory)
+                results.put(("progress", rank, stats.as_dict(), last_step))
+                last_report = now
+                if memory_limit is not None and stats.memory > memory_limit:
+                    results.put(("memory_limit", rank))
+                    stop_event.set()
+                    return
+    except Exception as e:
+        results.put(("error", rank, repr(e)))
+        stop_event.set()
+    finally:
+        # Whatever is still queued for other workers is abandoned, not flushed.
+        for inbox in inboxes:
+            abandon(inbox)
+
+def abandon(inbox) -> None:
+    """Lets the process exit without flushing `inbox`; manager-served queues hold nothing here to flush."""
+    cancel_join_thread = getattr(inbox, "cancel_join_thread", None)
+    if cancel_join_thread is not None:
+        cancel_join_thread()
+
+# What an HDAManager serves to the nodes. It lives in the manager's own server
+# process and is filled in there by _serve_init.
+_served: dict = {}
+
+def _serve_init(workers: int, config: dict) -> None:
+    _served["inboxes"] = [queue.Queue() for _ in range(workers)]
+    _served["results"] = queue.Queue()
+    _served["counters"] = [0] * (1 + workers)
+    _served["lock"] = threading.Lock()
+    _served["stop_event"] = threading.Event()
+    _served["config"] = config
+
+def _inbox(rank: int):
+    return _served["inboxes"][rank]
+
+def _results():
+    return _served["results"]
+
+def _counters():
+    return _served["counters"]
+
+def _lock():
+    return _served["lock"]
+
+def _stop_event():
+    return _served["stop_event"]
+
+def _config():
+    return _served["config"]
+
+class HDAManager(BaseManager):
+    """
+    Serves one search's queues, counters, lock and stop event over a socket, so
+    that its workers can be separate programs (nodes), see run_node. Every
+    operation is a round trip to the server, so nodes are far slower than the
+    local worker processes; they are meant for spreading a search that does
+    not fit one process's memory.
+    """
+
+HDAManager.register("inbox", _inbox)
+HDAManager.register("results", _results)
+HDAManager.register("counters", _counters, proxytype=ListProxy)
+HDAManager.register("lock", _lock, proxytype=AcquirerProxy)
+HDAManager.register("stop_event", _stop_event, proxytype=EventProxy)
+HDAManager.register("config", _config, proxytype=DictProxy)
+
+def run_node(address: tuple[str, int], authkey: bytes, rank: int) -> None:
+    """Runs worker `rank` of the search served at `address` (HDASolver with listen=address) until it ends."""
+    manager = HDAManager(address=address, authkey=authkey)
+    manager.connect()
+    config = manager.config().copy()
+    workers = config["workers"]
+    hda_worker(rank, config["mode"], config["order"], [manager.inbox(r) for r in range(workers)], manager.results(),
+               manager.counters(), manager.lock(), manager.stop_event(), config["timing"], config["memory_limit"],
+               tuple(config["symmetries"]))
+
+class HDASolver(ChessSolver):
+    """
+    Hash-distributed A* (or BFS with order="bfs") over worker processes, each
+    owning a share of the state space; see hda_worker.
+
+    Every solution has one move per captured piece, so the first goal any
+    worker generates is as short as any other and ends the search.
+    take_action seeds the root's children one per call, then only polls the
+    workers for at most POLL_INTERVAL, returning the last move they reported.
+    The time and expansion budget is checked here, against the workers' latest
+    reports; each worker enforces an equal share of the memory itself. A worker
+    that raises or dies ends the search with stop_reason "error".
+
+    With `listen` set to an (address, port), no workers are started here: the
+    search is served by an HDAManager there and waits for `processes` nodes to
+    connect with `authkey` (see run_node). A node that dies without a word is
+    not noticed; the search then ends only at its time budget.
+    """
+    uses_processes = True
+
+    def __init__(self, env: ChessPuzzle, timing: bool = False, budget: SearchBudget | None = None,
+                 processes: int | None = None, order: str = "astar", listen: tuple[str, int] | None = None,
+                 authkey: bytes | None = None):
+        super().__init__(env, timing, budget)
+        self.workers = processes or os.cpu_count() or 1
+        self.order = order
+        self.listen = listen
+        self.authkey = authkey
+
+        self.root_state = env.get_state()
+        env.set_state(self.root_state)
+
+        self.solution_found = False
+        self.final_path = []
+        self.seeds = []
+        if env.board.count_pieces() <= 1:
+            self.solution_found = True
+        else:
+            for move in env.board.get_all_valid_moves():
+                env.push(move)
+                self.seeds.append((move, env.get_state(), owner_key(env.get_state(), env.get_hash(), self.keys.group), env.board.count_pieces()))
+                env.pop()
+
+        # Latest SearchStats.as_dict() from each worker.
+        self.progress: dict[int, dict] = {}
+        self.last_step = None
+        self.processes = []
+        self.manager = None
+        self.started = False
+        self.closed = False
+        self.context = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        self.started = True
+        context = self.context
+        share = self.budget.share(self.workers).max_memory
+        if self.listen is not None:
+            config = {"workers": self.workers, "mode": self.env.mode, "order": self.order, "timing": self.stats.timed,
+                      "memory_limit": share, "symmetries": list(self.keys.group)}
+            self.manager = HDAManager(address=self.listen, authkey=self.authkey, ctx=context)
+            self.manager.start(_serve_init, (self.workers, config))
+            self.inboxes = [self.manager.inbox(rank) for rank in range(self.workers)]
+            self.results = self.manager.results()
+            self.lock = self.manager.lock()
+            self.counters = self.manager.counters()
+            self.stop_event = self.manager.stop_event()
+            print(f"HDA* waiting for {self.workers} nodes on {self.listen[0]}:{self.listen[1]}", file=sys.stderr)
+            return
+        self.inboxes = [context.Queue() for _ in range(self.workers)]
+        self.results = context.Queue()
+        self.lock = context.Lock()
+        self.counters = context.Array('q', 1 + self.workers, lock=False)
+        self.stop_event = context.Event()
+        for rank in range(self.workers):
+            process = context.Process(target=hda_worker, args=(rank, self.env.mode, self.order, self.inboxes, self.results, self.counters, self.lock, self.stop_event, self.stats.timed, share, self.keys.group), daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def frontier_size(self) -> int:
+        return len(self.seeds) + sum(progress["frontier"] for progress in self.progress.values())
+
+    def visited_size(self) -> int:
+        return sum(progress["visited"] for progress in self.progress.values())
+
+    def memory_usage(self) -> dict[str, int]:
+        return {"workers": sum(progress["memory"] for progress in self.progress.values())}
+
+    def clear_frontier(self) -> None:
+        self.close()
+
+    def sum_progress(self) -> None:
+        """Recomputes the counters and phase times from the workers' latest reports."""
+        stats = self.stats
+        reports = self.progress.values()
+        stats.expanded = sum(report["expanded"] for report in reports)
+        stats.generated = sum(report["generated"] for report in reports)
+        stats.duplicates = sum(report["duplicates"] for report in reports)
+        if stats.timed:
+            for phase in stats.times:
+                stats.times[phase] = sum(report["times"][phase] for report in reports)
+
+    def take_action(self):
+        if self.solution_found or self.stop_reason is not None or self.closed:
+            return None, None
+        reason = self.budget.exceeded(self.stats.expanded, self.elapsed())
+        if reason is not None:
+            self.stop(reason)
+            return None, None
+        if not self.started:
+            self.start()
+
+        if self.seeds:
+            move, state, key, pieces = self.seeds.pop(0)
+            self.last_step = (self.root_state, move)
+            if pieces <= 1:
+                self.finish([move])
+                return None, None
+            with self.lock:
+                self.counters[0] += 1
+            self.inboxes[owner_of(key, self.workers)].put([(state, 1, pack_path([move]))])
+            return self.last_step
+
+        deadline = time.perf_counter() + POLL_INTERVAL
+        while time.perf_counter() < deadline:
+            try:
+                message = self.results.get(timeout=POLL_INTERVAL / 4)
+            except queue.Empty:
+                continue
+            if message[0] == "solution":
+                self.finish(unpack_path(message[1]))
+                return None, None
+            if message[0] == "memory_limit":
+                self.stop("memory_limit")
+                return None, None
+            if message[0] == "error":
+                self.fail(f"worker {message[1]} raised {message[2]}")
+                return None, None
+            _, rank, report, last_step = message
+            self.progress[rank] = report
+            self.sum_progress()
+            if last_step is not None:
+                self.last_step = last_step
+
+        # A worker that died without a word (killed, or failed to start) would otherwise leave the search waiting forever.
+        for rank, process in enumerate(self.processes):
+            if process.exitcode not in (None, 0):
+                self.fail(f"worker {rank} exited with code {process.exitcode}")
+                return None, None
+
+        with self.lock:
+            exhausted = self.counters[0] == 0 and all(self.counters[1:])
+        if exhausted or self.last_step is None:
+            self.close()
+            return None, None
+        return self.last_step
+
+    def finish(self, path: list[tuple[int, int, int, int]]) -> None:
+        print("HDA* Solution Found!")
+        self.solution_found = True
+        self.final_path = path
+        self.close()
+
+    def close(self) -> None:
+        """Stops the workers; called when the search ends or is cancelled."""
+        if not self.started or self.closed:
+            return
+        self.closed = True
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(0.5)
+            if process.is_alive():
+                process.terminate()
+        for inbox in self.inboxes:
+            abandon(inbox)
+        self.processes = []
+        if self.manager is not None:
+            # A moment for the nodes to see the stop event before the server goes away.
+            time.sleep(NODE_STOP_GRACE)
+            self.manager.shutdown()
+            self.manager = None
+
+    def get_final_path(self):
+        return self.final_path
+
+class HDABFSSolver(HDASolver):
+    """HDASolver in breadth-first order."""
+    def __init__(self, env: ChessPuzzle, timing: bool = False, budget: SearchBudget | None = None,
+                 processes: int | None = None, listen: tuple[str, int] | None = None, authkey: bytes | None = None):
+        super().__init__(env, timing, budget, processes, "bfs", listen, authkey)
+
+def parse_address(text: str) -> tuple[str, int]:
+    """HOST:PORT, or PORT alone for this machine."""
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def _join_search(address: tuple[str, int], authkey: bytes, rank: int) -> None:
+    """Node process body: exits with 0 after taking part in a search, 1 when no search is served yet."""
+    try:
+        run_node(address, authkey, rank)
+    except ConnectionRefusedError:
+        sys.exit(1)
+    except (EOFError, ConnectionError):
+        # The search ended and its manager shut down while this node was still talking to it.
+        pass
+
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description="Run one worker of the HDA* searches served by `solve.py --listen`, as a node.")
+    parser.add_argument("--connect", required=True, metavar="HOST:PORT", help="address the searches are served on")
+    parser.add_argument("--rank", type=int, required=True, help="this node's worker number, from 0 to --nodes - 1")
+    parser.add_argument("--authkey", required=True, help="the key the searches are served with")
+    parser.add_argument("--once", action="store_true", help="stop after one search instead of waiting for the next")
+    args = parser.parse_args(argv)
+
+    address = parse_address(args.connect)
+    # Each search is joined from a fresh process: manager proxies keep their
+    # connections per address, and the next search is served on the same one.
+    context = multiprocessing.get_context("spawn")
+    while True:
+        process = context.Process(target=_join_search, args=(address, args.authkey.encode(), args.rank))
+        process.start()
+        process.join()
+        if process.exitcode == 0 and args.once:
+            return
+        time.sleep(NODE_RETRY_INTERVAL)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,32 @@
+import sys
+
+from src.entities.state import STATE_SIZE
+
+# Sizes of the objects the searches hold many of. Zobrist hashes use all 64
+# bits; node indices leave the small-int cache after the first few hundred nodes.
+HASH_BYTES = sys.getsizeof(1 << 63)
+INDEX_BYTES = sys.getsizeof(1 << 20)
+STATE_BYTES = sys.getsizeof(bytes(STATE_SIZE))
+# A* heap entry (f, -g, node): the tuple, -g and the node; f mostly stays cached.
+HEAP_ENTRY_BYTES = sys.getsizeof((0, 0, 0)) + 2 * INDEX_BYTES
+
+def hash_set_nbytes(keys) -> int:
+    """A set (or dict) of Zobrist hashes: its table plus one int per key."""
+    return sys.getsizeof(keys) + len(keys) * HASH_BYTES
+
+def visited_nbytes(visited) -> int:
+    if hasattr(visited, "nbytes"):
+        return visited.nbytes()
+    return hash_set_nbytes(visited)
+
+def node_list_nbytes(nodes) -> int:
+    """A list or deque of node indices."""
+    return sys.getsizeof(nodes) + len(nodes) * INDEX_BYTES
+
+def heap_nbytes(heap: list) -> int:
+    return sys.getsizeof(heap) + len(heap) * HEAP_ENTRY_BYTES
+
+def format_bytes(size: int) -> str:
+    if size < 1 << 20:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1 << 20):.1f} MB"
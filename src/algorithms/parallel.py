@@ -0,0 +1,231 @@
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+
+from src.entities.chess import ChessPuzzle
+from src.algorithms.algorithm import ChessSolver
+from src.algorithms.budget import SearchBudget
+from src.algorithms.DFS import DFSSolver
+
+# Split positions handed out per worker; more, smaller subtrees balance better.
+TASKS_PER_WORKER = 4
+# Deepest ply the root is split at.
+MAX_SPLIT_DEPTH = 3
+# Worker steps between checks of the shared cancel flag.
+CANCEL_CHECK_INTERVAL = 256
+# Most expansions a subtree makes between reports to the shared expansion count.
+REPORT_INTERVAL = 256
+# Longest a take_action call waits for a worker, in seconds.
+POLL_INTERVAL = 0.002
+
+_cancel_event = None
+_expanded = None
+_workers = 1
+
+def _init_worker(cancel_event, expanded, workers: int) -> None:
+    global _cancel_event, _expanded, _workers
+    _cancel_event = cancel_event
+    _expanded = expanded
+    _workers = workers
+
+def _add_expansions(count: int) -> int:
+    """Adds to the expansions of all subtrees so far and returns the new total."""
+    with _expanded.get_lock():
+        _expanded.value += count
+        return _expanded.value
+
+def solve_subtree(mode: str, state, timing: bool = False,
+                  budget: SearchBudget | None = None) -> tuple[list[tuple[int, int, int, int]] | None, dict, str | None]:
+    """
+    Pool task: DFS below one split position. Returns (path or None,
+    SearchStats.as_dict(), stop_reason).
+
+    The budget's max_expansions holds for all subtrees together: each adds its
+    expansions to a shared count, before it could have used more than its
+    worker's share of what is left, and stops with "expansion_limit" once the
+    count reaches the limit.
+    """
+    max_expansions = budget.max_expansions if budget is not None else None
+    if max_expansions is not None:
+        budget = SearchBudget(None, budget.max_seconds, budget.max_memory)
+    solver = DFSSolver(ChessPuzzle(mode, state), timing, budget)
+    reported = 0
+    next_report = 0
+    steps = 0
+    # ParallelSolver announces the solution; stdout may be carrying someone's output (solve.py's JSON lines).
+    with contextlib.redirect_stdout(sys.stderr):
+        while True:
+            if steps % CANCEL_CHECK_INTERVAL == 0 and _cancel_event.is_set():
+                return None, solver.get_stats().as_dict(), None
+            if max_expansions is not None and solver.stats.expanded >= next_report:
+                expanded = solver.stats.expanded
+                total = _add_expansions(expanded - reported)
+                reported = expanded
+                if total >= max_expansions:
+                    solver.stop("expansion_limit")
+                    break
+                next_report = expanded + max(1, min(REPORT_INTERVAL, (max_expansions - total) // _workers))
+            state, move = solver.take_action()
+            if state is None and move is None:
+                break
+            steps += 1
+    if max_expansions is not None:
+        _add_expansions(solver.stats.expanded - reported)
+    return (solver.get_final_path() if solver.solution_found else None), solver.get_stats().as_dict(), solver.stop_reason
+
+class ParallelSolver(ChessSolver):
+    """
+    Root-split search on a process pool. The first plies are expanded here until
+    there are a few positions per worker, each one is searched by a DFSSolver in
+    a pool process, and the first solution found cancels the others.
+
+    take_action never blocks for long: it hands out one split position per call,
+    then waits at most POLL_INTERVAL for a result and returns the root move of a
+    branch still being searched, so the frame loop keeps running.
+
+    The time and expansion budget is checked here, against the subtrees that
+    have finished. The subtrees also add up their expansions in one shared
+    count and each gets an equal share of the memory; the first to find the
+    budget spent stops the whole search.
+    A subtree that raises, or a pool worker that dies, ends the search with
+    stop_reason "error".
+    """
+    uses_processes = True
+
+    def __init__(self, env: ChessPuzzle, timing: bool = False, budget: SearchBudget | None = None, processes: int | None = None):
+        super().__init__(env, timing, budget)
+        self.processes = processes or os.cpu_count() or 1
+
+        start_state = env.get_state()
+        env.set_state(start_state)
+
+        self.solution_found = False
+        self.final_path = []
+        # Split positions as (state, moves from the root, state before the last move).
+        self.tasks = self.split_root(start_state)
+        self.running = []
+        self.heartbeat = 0
+
+        self.context = multiprocessing.get_context("spawn")
+        self.cancel_event = self.context.Event()
+        # Expansions of all subtrees, running or finished, see solve_subtree.
+        self.shared_expanded = self.context.Value('q', 0)
+        self.pool = None
+        # The pool's processes as started. Pool replaces a worker that dies and
+        # drops the task it was running, whose result then never becomes ready.
+        self.workers = []
+
+    def split_root(self, start_state) -> list[tuple]:
+        level = [(start_state, [], None)]
+        for _ in range(MAX_SPLIT_DEPTH):
+            if len(level) >= self.processes * TASKS_PER_WORKER:
+                break
+            next_level = []
+            seen = set()
+            for state, prefix, _ in level:
+                self.env.set_state(state)
+                if self.env.board.count_pieces() <= 1:
+                    self.solution_found = True
+                    self.final_path = prefix
+                    return []
+                for move in self.env.board.get_all_valid_moves():
+                    self.env.push(move)
+                    if self.env.get_hash() not in seen:
+                        seen.add(self.env.get_hash())
+                        next_level.append((self.env.get_state(), prefix + [move], state))
+                    self.env.pop()
+            level = next_level
+        self.env.set_state(start_state)
+        return level
+
+    def frontier_size(self) -> int:
+        return len(self.tasks) + len(self.running)
+
+    def memory_usage(self) -> dict[str, int]:
+        # The subtrees are held by the pool workers, see add_subtree_stats.
+        return {}
+
+    def clear_frontier(self) -> None:
+        self.close()
+        self.tasks = []
+        self.running = []
+
+    def add_subtree_stats(self, subtree_stats: dict) -> None:
+        """
+        Folds a finished subtree's counters into this search's; the frontier stays
+        the task count, and the memory peak is the largest of any one subtree.
+        """
+        stats = self.stats
+        stats.expanded += subtree_stats["expanded"]
+        stats.generated += subtree_stats["generated"]
+        stats.duplicates += subtree_stats["duplicates"]
+        stats.memory_peak = max(stats.memory_peak, subtree_stats["memory_peak"])
+        if subtree_stats["times"] is not None:
+            for phase, seconds in subtree_stats["times"].items():
+                stats.times[phase] += seconds
+
+    def take_action(self):
+        if self.solution_found:
+            return None, None
+        reason = self.budget.exceeded(self.stats.expanded, self.elapsed())
+        if reason is not None:
+            self.stop(reason)
+            return None, None
+
+        if self.tasks:
+            if self.pool is None:
+                self.pool = self.context.Pool(self.processes, initializer=_init_worker, initargs=(self.cancel_event, self.shared_expanded, self.processes))
+                self.workers = list(self.pool._pool)
+            state, prefix, state_before_move = self.tasks.pop(0)
+            budget = self.budget.share(self.processes)
+            self.running.append((self.pool.apply_async(solve_subtree, (self.env.mode, state, self.stats.timed, budget)), prefix, state_before_move))
+            return state_before_move, prefix[-1]
+
+        deadline = time.perf_counter() + POLL_INTERVAL
+        while self.running:
+            for i, (result, prefix, state_before_move) in enumerate(self.running):
+                if not result.ready():
+                    continue
+                try:
+                    path, subtree_stats, stop_reason = result.get()
+                except Exception as e:
+                    self.fail(f"a subtree search raised {e!r}")
+                    return None, None
+                self.add_subtree_stats(subtree_stats)
+                del self.running[i]
+                if stop_reason is not None:
+                    self.stop(stop_reason)
+                    return None, None
+                if path is not None:
+                    print("Parallel Solution Found!")
+                    self.solution_found = True
+                    self.final_path = prefix + path
+                    self.close()
+                    return None, None
+                return state_before_move, prefix[-1]
+            dead = [worker for worker in self.workers if worker.exitcode is not None]
+            if dead:
+                self.fail(f"pool worker {dead[0].pid} exited with code {dead[0].exitcode}")
+                return None, None
+            if time.perf_counter() >= deadline:
+                self.heartbeat = (self.heartbeat + 1) % len(self.running)
+                _, prefix, state_before_move = self.running[self.heartbeat]
+                return state_before_move, prefix[-1]
+            time.sleep(POLL_INTERVAL / 4)
+
+        self.close()
+        return None, None
+
+    def close(self) -> None:
+        """Cancels the workers still searching and shuts the pool down."""
+        if self.pool is not None:
+            self.cancel_event.set()
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            self.workers = []
+
+    def get_final_path(self):
+        return self.final_path
@@ -0,0 +1,118 @@
+import atexit
+import json
+import os
+import sys
+from collections import OrderedDict
+
+from src.entities.chess import ChessPuzzle, ENGINE_VERSION
+from src.entities.state import State
+from src.entities.symmetry import INVERSES, canonical_transform, transform_move, transform_state
+from src.entities.zobrist import state_zobrist
+
+SOLUTION_CACHE_FILE = "data/solution_cache.json"
+# Default number of solutions kept; the least recently used one goes first.
+SOLUTION_CACHE_LIMIT = 2000
+
+def canonical_key(state: State) -> str:
+    """
+    Key for a start position: the Zobrist hash (which includes the side to move
+    and solo move counts) of its canonical image, so mirrored and rotated
+    boards share an entry.
+    """
+    return f"{state_zobrist(transform_state(state, canonical_transform(state))):016x}"
+
+class SolutionCache:
+    """
+    Solutions found earlier, one per (mode, solver, start position), kept in a
+    JSON file between runs. The file holds the engine version and the entries
+    oldest first; a file from another ENGINE_VERSION is ignored and replaced.
+
+    Paths are stored for the canonical image of their start position (see
+    symmetry.canonical_transform) and mapped back onto the board they are
+    asked for. A cached path is replayed before it is returned, so a hash
+    collision or an entry that no longer holds is dropped and reads as a miss.
+
+    Changes to the entries are written at once; a hit only moves its entry to
+    the back in memory, and that order reaches the file with the next write or
+    flush (at exit for the shared cache).
+    """
+    def __init__(self, path: str = SOLUTION_CACHE_FILE, max_size: int = SOLUTION_CACHE_LIMIT):
+        self.path = path
+        self.max_size = max_size
+        self.entries: OrderedDict[str, list[list[int]]] = OrderedDict()
+        # Whether the order in memory differs from the file's.
+        self.dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("engine_version") == ENGINE_VERSION:
+            self.entries = OrderedDict(data.get("entries", []))
+
+    def save(self) -> None:
+        data = {"engine_version": ENGINE_VERSION, "entries": list(self.entries.items())}
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Could not save the solution cache: {e}", file=sys.stderr)
+
+    def flush(self) -> None:
+        """Writes the recency order of the hits since the last save, if any."""
+        if self.dirty:
+            self.save()
+
+    @staticmethod
+    def entry_key(mode: str, solver_name: str, state: State) -> str:
+        return f"{mode}/{solver_name}/{canonical_key(state)}"
+
+    def get(self, mode: str, solver_name: str, state: State) -> list[tuple[int, int, int, int]] | None:
+        """The cached solution of `state` by that solver, or None."""
+        key = self.entry_key(mode, solver_name, state)
+        path = self.entries.get(key)
+        if path is None:
+            return None
+        t = INVERSES[canonical_transform(state)]
+        moves = [transform_move(move, t) for move in path]
+        env = ChessPuzzle(mode, state)
+        if not (all(env.push(move) for move in moves) and env.board.count_pieces() == 1):
+            del self.entries[key]
+            self.save()
+            return None
+        self.entries.move_to_end(key)
+        self.dirty = True
+        return moves
+
+    def put(self, mode: str, solver_name: str, state: State, path: list[tuple[int, int, int, int]]) -> None:
+        key = self.entry_key(mode, solver_name, state)
+        t = canonical_transform(state)
+        self.entries[key] = [list(transform_move(move, t)) for move in path]
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        self.save()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.save()
+
+_cache: SolutionCache | None = None
+
+def solution_cache() -> SolutionCache:
+    """The cache shared by everything in this process, read from disk on first use."""
+    global _cache
+    if _cache is None:
+        _cache = SolutionCache()
+        atexit.register(_cache.flush)
+    return _cache
@@ -0,0 +1,197 @@
+from src.entities.attack_tables import ATTACKS
+from src.entities.state import *
+from src.entities.symmetry import IDENTITY, SQUARE_MAPS, child_hashes, stabilizer, symmetric_hashes
+from src.entities.zobrist import state_zobrist
+
+# Largest index space given a dense bitset (8 MB, about what a hashed set of
+# 120k states costs); bigger puzzles keep hashed sets.
+DENSE_INDEX_LIMIT = 1 << 26
+# Solo pieces stop moving after their second capture.
+SOLO_MOVE_LIMIT = 2
+# Whether searches from a symmetric root visit only one of each set of mirrored or rotated positions.
+SYMMETRY_REDUCTION = True
+
+class OccupancyIndex:
+    """
+    Dense integer index for the states reachable from one root.
+
+    Every move is a capture onto an occupied square, so the occupied squares of a
+    reachable state are a subset of the root's N occupied squares ("slots"). Each
+    slot only ever holds the cells of pieces that can walk to it through slots, so
+    a state is a mixed-radix number with one digit per slot: 0 when empty, else
+    the position of its cell in that slot's list. The melee turn is implied by the
+    number of pieces left and is not encoded.
+    """
+    def __init__(self, root: State):
+        self.slots: list[int] = [square for square in range(64) if root[square]]
+        counts_tracked = bool(root[FLAGS_INDEX] & HAS_MOVE_COUNT_FLAG)
+
+        slot_cells: dict[int, list[int]] = {square: [] for square in self.slots}
+        for start in self.slots:
+            for square, cell in self._reachable_cells(root, start, counts_tracked):
+                if cell not in slot_cells[square]:
+                    slot_cells[square].append(cell)
+
+        # digits[square][cell] -> digit; squares outside the slots keep an empty table.
+        self.digits: list[list[int]] = [[] for _ in range(64)]
+        self.weights: list[int] = [0] * 64
+        self.size: int = 1
+        for square in self.slots:
+            table = [-1] * 64
+            table[0] = 0
+            for digit, cell in enumerate(sorted(slot_cells[square]), start=1):
+                table[cell] = digit
+            self.digits[square] = table
+            self.weights[square] = self.size
+            self.size *= len(slot_cells[square]) + 1
+        self.counts_tracked = counts_tracked
+
+    def _reachable_cells(self, root: State, start: int, counts_tracked: bool) -> set[tuple[int, int]]:
+        """(square, cell) pairs the piece starting on `start` can ever occupy."""
+        cell = root[start]
+        attacks = ATTACKS[not cell & BLACK_FLAG][cell & PIECE_MASK]
+        seen = {(start, cell)}
+        frontier = [(start, cell)]
+        while frontier:
+            square, cell = frontier.pop()
+            if counts_tracked:
+                if cell >> COUNT_SHIFT >= SOLO_MOVE_LIMIT:
+                    continue
+                cell += 1 << COUNT_SHIFT
+            for target in self.slots:
+                if target != square and attacks[square] >> target & 1 and (target, cell) not in seen:
+                    seen.add((target, cell))
+                    frontier.append((target, cell))
+        return seen
+
+    @classmethod
+    def for_state(cls, root: State, limit: int | None = None) -> "OccupancyIndex | None":
+        """The index for a root, or None when its index space exceeds the limit."""
+        if limit is None:
+            limit = DENSE_INDEX_LIMIT
+        index = cls(root)
+        return index if index.size <= limit else None
+
+    def index(self, state: State) -> int:
+        digits, weights = self.digits, self.weights
+        return sum(digits[square][state[square]] * weights[square] for square in self.slots)
+
+    def child_index(self, index: int, state: State, move: tuple[int, int, int, int]) -> int:
+        """Index after playing a capture in `state` (whose index is `index`), without building the child."""
+        from_square = move[0] * 8 + move[1]
+        to_square = move[2] * 8 + move[3]
+        moving = state[from_square]
+        captured = state[to_square]
+        moved = moving + (1 << COUNT_SHIFT) if self.counts_tracked else moving
+        from_digits, to_digits = self.digits[from_square], self.digits[to_square]
+        return (index - from_digits[moving] * self.weights[from_square]
+                + (to_digits[moved] - to_digits[captured]) * self.weights[to_square])
+
+    def image_indices(self, state: State, group: tuple[int, ...]) -> list[int]:
+        """Index of each image of `state` under `group`, which must map the root onto itself."""
+        occupied = [(square, state[square]) for square in self.slots if state[square]]
+        digits, weights = self.digits, self.weights
+        indices = []
+        for t in group:
+            square_map = SQUARE_MAPS[t]
+            indices.append(sum(digits[square_map[square]][cell] * weights[square_map[square]] for square, cell in occupied))
+        return indices
+
+    def child_image_indices(self, indices: list[int], group: tuple[int, ...], state: State,
+                            move: tuple[int, int, int, int]) -> list[int]:
+        """image_indices after playing a capture in `state`, from the image indices of `state`."""
+        from_square = move[0] * 8 + move[1]
+        to_square = move[2] * 8 + move[3]
+        moving = state[from_square]
+        captured = state[to_square]
+        moved = moving + (1 << COUNT_SHIFT) if self.counts_tracked else moving
+        digits, weights = self.digits, self.weights
+        children = []
+        for index, t in zip(indices, group):
+            image_from, image_to = SQUARE_MAPS[t][from_square], SQUARE_MAPS[t][to_square]
+            to_digits = digits[image_to]
+            children.append(index - digits[image_from][moving] * weights[image_from]
+                            + (to_digits[moved] - to_digits[captured]) * weights[image_to])
+        return children
+
+class DenseVisited:
+    """A set of dense state indices kept as a bitset, one bit per possible state."""
+    def __init__(self, size: int):
+        self.bits = bytearray((size + 7) >> 3)
+        self.count = 0
+
+    def __contains__(self, index: int) -> bool:
+        return bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+    def add(self, index: int) -> None:
+        byte = self.bits[index >> 3]
+        bit = 1 << (index & 7)
+        if not byte & bit:
+            self.bits[index >> 3] = byte | bit
+            self.count += 1
+
+class StateKeys:
+    """
+    Visited-set keys for one search: dense indices and a bitset when the root's
+    OccupancyIndex fits, Zobrist hashes and a plain set otherwise.
+
+    When the root is symmetric (see symmetry.stabilizer), a key stands for a
+    position and its images under the root's symmetries: it is the lowest of
+    their keys, so only one of them is searched. Every image of a reachable
+    position is reachable too, and the image keys of a child are updated from
+    its parent's like the plain ones. Asymmetric roots, the usual case, keep
+    the plain keys at no extra cost.
+    """
+    def __init__(self, root: State, limit: int | None = None, symmetric: bool | None = None):
+        if symmetric is None:
+            symmetric = SYMMETRY_REDUCTION
+        self.state_index = OccupancyIndex.for_state(root, limit)
+        self.group = stabilizer(root) if symmetric else IDENTITY
+        # Image keys of the last position passed to key(), the parent child_key is then called for.
+        self.parent_state = None
+        self.parent_keys = None
+
+    @property
+    def dense(self) -> bool:
+        return self.state_index is not None
+
+    def new_set(self) -> DenseVisited | set:
+        if self.state_index is not None:
+            return DenseVisited(self.state_index.size)
+        return set()
+
+    @property
+    def symmetric(self) -> bool:
+        return len(self.group) > 1
+
+    def key(self, state: State) -> int:
+        if len(self.group) > 1:
+            self.parent_state = state
+            self.parent_keys = self.image_keys(state)
+            return min(self.parent_keys)
+        if self.state_index is not None:
+            return self.state_index.index(state)
+        return state_zobrist(state)
+
+    def image_keys(self, state: State) -> list[int]:
+        if self.state_index is not None:
+            return self.state_index.image_indices(state, self.group)
+        return symmetric_hashes(state, self.group)
+
+    def child_key(self, key: int, state: State, move: tuple[int, int, int, int], env) -> int:
+        """Key of the child reached by `move`; `env` must already have the move pushed."""
+        if len(self.group) > 1:
+            if state is not self.parent_state:
+                self.key(state)
+            if self.state_index is not None:
+                return min(self.state_index.child_image_indices(self.parent_keys, self.group, state, move))
+            return min(child_hashes(self.parent_keys, self.group, state, move))
+        if self.state_index is not None:
+            return self.state_index.child_index(key, state, move)
+        return env.get_hash()
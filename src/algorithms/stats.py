@@ -0,0 +1,61 @@
+import time
+
+PHASES = ("movegen", "hashing", "heuristic", "queue")
+
+def _no_clock() -> float:
+    return 0.0
+
+class SearchStats:
+    """
+    Counters for one search, kept by the solver as it runs.
+
+    expanded: nodes whose moves were generated; generated: children made by
+    playing a move; duplicates: children dropped because they were already
+    visited. frontier, visited and memory (estimated bytes held by the search,
+    see ChessSolver.memory_usage) are refreshed by ChessSolver.get_stats(); the
+    memory peak is also sampled every BUDGET_CHECK_INTERVAL expansions.
+
+    With timed=True, `clock` is time.perf_counter and the solvers add the time
+    spent in each phase to `times`. movegen also covers make/unmake, hashing the
+    key computation and visited-set checks, heuristic the tablebase probe, and
+    queue the frontier pushes and pops. Untimed, `clock` always returns 0 and only
+    the counters cost anything.
+    """
+    __slots__ = ("expanded", "generated", "duplicates", "frontier", "frontier_peak", "visited", "memory", "memory_peak", "timed", "clock", "times")
+
+    def __init__(self, timed: bool = False):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.frontier = 0
+        self.frontier_peak = 0
+        self.visited = 0
+        self.memory = 0
+        self.memory_peak = 0
+        self.timed = timed
+        self.clock = time.perf_counter if timed else _no_clock
+        self.times: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    def as_dict(self) -> dict:
+        """Plain, picklable and JSON-friendly copy; `times` is None when untimed."""
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "frontier": self.frontier,
+            "frontier_peak": self.frontier_peak,
+            "visited": self.visited,
+            "memory": self.memory,
+            "memory_peak": self.memory_peak,
+            "times": dict(self.times) if self.timed else None,
+        }
+
+    def restore(self, saved: dict) -> None:
+        """Carries on from the counters of an as_dict() copy; its phase times are kept only if both are timed."""
+        self.expanded = saved["expanded"]
+        self.generated = saved["generated"]
+        self.duplicates = saved["duplicates"]
+        self.frontier_peak = saved["frontier_peak"]
+        self.memory_peak = saved["memory_peak"]
+        if self.timed and saved["times"] is not None:
+            self.times.update(saved["times"])
@@ -0,0 +1,108 @@
+import multiprocessing
+import time
+from array import array
+
+from src.algorithms.arena import pack_move, unpack_move
+from src.algorithms.budget import SearchBudget, STOP_REASONS
+from src.entities.chess import ChessPuzzle
+from src.entities.state import State
+
+# Seconds between progress messages; cancellation is also checked this often.
+PROGRESS_INTERVAL = 0.05
+
+FINAL_STATUSES = ("finished", "failed", *STOP_REASONS, "error", "cancelled")
+
+def pack_path(path: list[tuple[int, int, int, int]]) -> bytes:
+    """Two bytes per move, see arena.pack_move."""
+    return array('H', [pack_move(move) for move in path]).tobytes()
+
+def unpack_path(data: bytes) -> list[tuple[int, int, int, int]]:
+    codes = array('H')
+    codes.frombytes(data)
+    return [unpack_move(code) for code in codes]
+
+def run_search(conn, cancel_event, algorithm_class, mode: str, state: State, timing: bool = False,
+               budget: SearchBudget | None = None) -> None:
+    """
+    Worker process body. Sends the same (status, data) messages as
+    PuzzleLogic.solver_iterator, except that "finished" carries a packed path
+    and a cancelled search ends with ("cancelled", None).
+    """
+    try:
+        solver = algorithm_class(ChessPuzzle(mode, state), timing, budget)
+        iterations = 0
+        start_t = time.perf_counter()
+        last_report = start_t
+
+        def progress(now: float) -> dict:
+            return dict(solver.get_stats().as_dict(), steps=iterations, compute_time=now - start_t)
+
+        while True:
+            state, move = solver.take_action()
+            if state is None and move is None:
+                break
+
+            iterations += 1
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                if cancel_event.is_set():
+                    conn.send(("cancelled", None))
+                    return
+                conn.send(("running", progress(now)))
+                last_report = now
+
+        conn.send(("running", progress(time.perf_counter())))
+        if solver.solution_found:
+            conn.send(("finished", pack_path(solver.get_final_path())))
+        elif solver.stop_reason is not None:
+            conn.send((solver.stop_reason, None))
+        else:
+            conn.send(("failed", None))
+    except Exception as e:
+        conn.send(("error", repr(e)))
+    finally:
+        conn.close()
+
+class SearchWorker:
+    """A search running in its own process, started as soon as the worker is created."""
+    def __init__(self, algorithm_class, mode: str, state: State, timing: bool = False, budget: SearchBudget | None = None):
+        # spawn rather than fork: the parent holds a pygame display and SDL state.
+        context = multiprocessing.get_context("spawn")
+        self.cancel_event = context.Event()
+        self.conn, child_conn = context.Pipe(duplex=False)
+        self.process = context.Process(target=run_search, args=(child_conn, self.cancel_event, algorithm_class, mode, state, timing, budget), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.done = False
+
+    def poll(self) -> list[tuple[str, object]]:
+        """Messages received since the last call, without blocking."""
+        messages = []
+        while not self.done:
+            try:
+                if not self.conn.poll():
+                    break
+                status, data = self.conn.recv()
+            except (EOFError, OSError):
+                messages.append(("error", "Worker exited"))
+                self.done = True
+                break
+            if status == "finished":
+                data = unpack_path(data)
+            messages.append((status, data))
+            self.done = status in FINAL_STATUSES
+        if self.done:
+            self.close()
+        return messages
+
+    def cancel(self, timeout: float = 0.5) -> None:
+        self.cancel_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.done = True
+        self.close()
+
+    def close(self) -> None:
+        self.process.join()
+        self.conn.close()
@@ -0,0 +1,40 @@
+# Solver core without the game: boards, ChessPuzzle and the solvers.
+#
+# Nothing imported from here touches pygame or settings (no display, no
+# settings file I/O), and numpy is only loaded by ChessPuzzle.get_observation,
+# so headless tools and worker processes start fast:
+#
+#   from src.engine import ChessPuzzle, ALGORITHMS
+#   solver = ALGORITHMS["astar"](ChessPuzzle("ranger", board))
+
+from src.entities.state import State, pack_state, unpack_board
+from src.entities.chess import ChessPuzzle, ChessRangerBoard, ChessMeleeBoard, ChessSoloBoard
+from src.entities.tablebase import load_tablebase
+from src.algorithms.algorithm import ChessSolver
+from src.algorithms.budget import SearchBudget, STOP_REASONS
+from src.algorithms.Astar import AStarSolver
+from src.algorithms.BFS import BFSSolver
+from src.algorithms.DFS import DFSSolver
+from src.algorithms.parallel import ParallelSolver
+from src.algorithms.hda import HDASolver, HDABFSSolver
+from src.algorithms.checkpoint import CheckpointError, save_checkpoint, load_checkpoint
+
+MODES = ("ranger", "melee", "solo")
+
+ALGORITHMS: dict[str, type[ChessSolver]] = {
+    "astar": AStarSolver,
+    "bfs": BFSSolver,
+    "dfs": DFSSolver,
+    "parallel": ParallelSolver,
+    "hda": HDASolver,
+    "hda-bfs": HDABFSSolver,
+}
+
+__all__ = [
+    "State", "pack_state", "unpack_board",
+    "ChessPuzzle", "ChessRangerBoard", "ChessMeleeBoard", "ChessSoloBoard",
+    "load_tablebase",
+    "ChessSolver", "SearchBudget", "STOP_REASONS", "AStarSolver", "BFSSolver", "DFSSolver", "ParallelSolver", "HDASolver", "HDABFSSolver",
+    "CheckpointError", "save_checkpoint", "load_checkpoint",
+    "MODES", "ALGORITHMS",
+]
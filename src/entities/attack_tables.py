@@ -0,0 +1,68 @@
+# Attack and between-square tables, built once at import.
+# Squares are indexed row * 8 + col, matching the Board mailbox, and every table
+# entry is a 64-bit mask over those squares.
+
+KNIGHT_DELTAS: tuple[tuple[int, int], ...] = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_DELTAS: tuple[tuple[int, int], ...] = ((1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0))
+PAWN_DELTAS: dict[bool, tuple[tuple[int, int], ...]] = {True: ((-1, 1), (-1, -1)), False: ((1, 1), (1, -1))}
+DIAGONAL_DIRECTIONS: tuple[tuple[int, int], ...] = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+ORTHOGONAL_DIRECTIONS: tuple[tuple[int, int], ...] = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+def _on_board(r: int, c: int) -> bool:
+    return 0 <= r < 8 and 0 <= c < 8
+
+def _step_attacks(deltas: tuple[tuple[int, int], ...]) -> list[int]:
+    table = []
+    for square in range(64):
+        r, c = divmod(square, 8)
+        mask = 0
+        for dr, dc in deltas:
+            if _on_board(r + dr, c + dc):
+                mask |= 1 << ((r + dr) * 8 + c + dc)
+        table.append(mask)
+    return table
+
+def _ray_attacks(directions: tuple[tuple[int, int], ...]) -> list[int]:
+    """Empty-board slider attacks; blockers are handled with BETWEEN."""
+    table = []
+    for square in range(64):
+        r, c = divmod(square, 8)
+        mask = 0
+        for dr, dc in directions:
+            tr, tc = r + dr, c + dc
+            while _on_board(tr, tc):
+                mask |= 1 << (tr * 8 + tc)
+                tr += dr
+                tc += dc
+        table.append(mask)
+    return table
+
+def _between() -> list[list[int]]:
+    table = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        r, c = divmod(square, 8)
+        for dr, dc in DIAGONAL_DIRECTIONS + ORTHOGONAL_DIRECTIONS:
+            mask = 0
+            tr, tc = r + dr, c + dc
+            while _on_board(tr, tc):
+                table[square][tr * 8 + tc] = mask
+                mask |= 1 << (tr * 8 + tc)
+                tr += dr
+                tc += dc
+    return table
+
+KNIGHT_ATTACKS: list[int] = _step_attacks(KNIGHT_DELTAS)
+KING_ATTACKS: list[int] = _step_attacks(KING_DELTAS)
+PAWN_ATTACKS: dict[bool, list[int]] = {color: _step_attacks(deltas) for color, deltas in PAWN_DELTAS.items()}
+BISHOP_ATTACKS: list[int] = _ray_attacks(DIAGONAL_DIRECTIONS)
+ROOK_ATTACKS: list[int] = _ray_attacks(ORTHOGONAL_DIRECTIONS)
+QUEEN_ATTACKS: list[int] = [BISHOP_ATTACKS[sq] | ROOK_ATTACKS[sq] for sq in range(64)]
+
+# ATTACKS[color][piece code][square], piece codes as in figure.int_to_piece (index 0 unused).
+ATTACKS: dict[bool, list[list[int]]] = {
+    color: [[0] * 64, PAWN_ATTACKS[color], KNIGHT_ATTACKS, BISHOP_ATTACKS, ROOK_ATTACKS, QUEEN_ATTACKS, KING_ATTACKS]
+    for color in (True, False)
+}
+
+# BETWEEN[from][to]: squares strictly between two aligned squares, 0 when not aligned or adjacent.
+BETWEEN: list[list[int]] = _between()
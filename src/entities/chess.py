@@ -1,21 +1,20 @@
-import numpy as np
 from src.entities.figure import *
+from src.entities.zobrist import MOVE_COUNT_KEYS, TURN_KEY
+from src.entities.tablebase import load_tablebase
 import copy
+
+# Version of the game rules. Bump it with any change to which moves are legal
+# or what they lead to: results kept on disk, like the solution cache, are then dropped.
+ENGINE_VERSION = 1
+
 class ChessRangerBoard(Board): 
-    def import_board(self, board: list[list[int]]) -> None:
-        self.board = []
-        for row in board:
-            self.board.append([])
-            for piece in row:
-                if piece == 0:
-                    self.board[-1].append(None)
-                else:
-                    self.board[-1].append(int_to_piece[abs(piece)](True))
+    def create_piece(self, value: int) -> Piece:
+        return PIECES[abs(value)]
     
 class ChessMeleeBoard(Board):
     def __init__(self, board: list[list[int]] = [[0 for _ in range(8)] for _ in range(8)]) -> None:
-        super().__init__(board)
         self.waiting_turn: bool = True
+        super().__init__(board)
 
     def is_valid_move(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> bool:
         if not super().is_valid_move(from_pos, to_pos):
@@ -35,31 +34,39 @@ class ChessMeleeBoard(Board):
 
         if self.is_valid_move(from_pos, to_pos):
             self.waiting_turn = not self.waiting_turn    
-            self.board[to_pos[0]][to_pos[1]] = self.board[from_pos[0]][from_pos[1]]
-            self.board[from_pos[0]][from_pos[1]] = None
+            self.zobrist ^= TURN_KEY
+            self.apply_move(from_pos, to_pos)
             return True
             
         return False
 
-    def get_all_valid_moves(self, specific_pos=None):
-        moves = []
-        
-        def scan_moves(r, c):
-            piece = self.board[r][c]
-            if piece is not None and piece.get_color() == self.waiting_turn:
-                 for tr in range(8):
-                    for tc in range(8):
-                        if self.is_valid_move((r, c), (tr, tc)):
-                            moves.append((r, c, tr, tc))
-
-        if specific_pos:
-            scan_moves(specific_pos[0], specific_pos[1])
-        else:
-            for r in range(8):
-                for c in range(8):
-                    scan_moves(r, c)
-                    
-        return moves
+    def encode_cells(self) -> bytearray:
+        cells = super().encode_cells()
+        cells[FLAGS_INDEX] = encode_flags(self.waiting_turn, None)
+        return cells
+
+    def import_state(self, state: State) -> None:
+        turn = state_turn(state)
+        if turn is not None:
+            self.waiting_turn = turn
+        super().import_state(state)
+
+    def undo_record(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> tuple:
+        return super().undo_record(from_pos, to_pos) + (self.waiting_turn,)
+
+    def unmake_move(self, undo: tuple) -> None:
+        super().unmake_move(undo)
+        self.waiting_turn = undo[4]
+
+    def movable_mask(self) -> int:
+        if self.waiting_turn:
+            return self.color_mask
+        return self.occupied & ~self.color_mask
+
+    def target_mask(self, piece: Piece) -> int:
+        if piece.color:
+            return self.occupied & ~self.color_mask
+        return self.color_mask
 
 class ChessSoloBoard(Board):
     def __init__(self, board: list[list[int]] = [[0 for _ in range(8)] for _ in range(8)]) -> None:
@@ -77,80 +84,76 @@ class ChessSoloBoard(Board):
                 if self.board[r][c] is not None:
                     self.move_count[(r, c)] = 0
 
+    def create_piece(self, value: int) -> Piece:
+        return PIECES[abs(value)]
+
     def import_board(self, board: list[list[int]]) -> None:
-        self.board = []
-        for row in board:
-            self.board.append([])
-            for piece in row:
-                if piece == 0:
-                    self.board[-1].append(None)
-                else:
-                    self.board[-1].append(int_to_piece[abs(piece)](True))
+        self.move_count = {}
+        super().import_board(board)
         self._initialize_move_count()
+
+    def encode_cells(self) -> bytearray:
+        cells = super().encode_cells()
+        for (r, c), count in self.move_count.items():
+            if count > 0 and cells[r * 8 + c]:
+                cells[r * 8 + c] |= count << COUNT_SHIFT
+        cells[FLAGS_INDEX] = encode_flags(None, self.move_count)
+        return cells
+
+    def import_state(self, state: State) -> None:
+        move_count = state_move_count(state)
+        self.move_count = move_count if move_count is not None else {}
+        super().import_state(state)
+        if move_count is None:
+            self._initialize_move_count()
     
     def is_valid_move(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> bool:
-        r1, c1 = from_pos
-        r2, c2 = to_pos
-        
-        if not (0 <= r1 < 8 and 0 <= c1 < 8 and 0 <= r2 < 8 and 0 <= c2 < 8):
-            return False
-        
-        piece = self.board[r1][c1]
-        target = self.board[r2][c2]
-        
-        if piece is None or target is None:
+        if not super().is_valid_move(from_pos, to_pos):
             return False
-   
-        if piece_to_int[type(target)] == 6: 
+        target = self.board[to_pos[0]][to_pos[1]]
+        if target.code == 6: 
             return False  
-        
         if self.move_count.get(from_pos, 0) >= 2:
             return False
-        
-        move_delta = (r2 - r1, c2 - c1)
-
-        if not piece.is_legal_move(move_delta):
-            return False
-
-        if not self.is_path_clear(from_pos, to_pos):
-            return False
-        
         return True
 
-    def get_all_valid_moves(self, specific_pos: tuple[int, int] | None = None) -> list[tuple[int, int, int, int]]:
-        moves = []
-        
-        if specific_pos:
-            r, c = specific_pos
-            if self.board[r][c] is not None:
-                for tr in range(8):
-                    for tc in range(8):
-                        if self.is_valid_move((r, c), (tr, tc)):
-                            moves.append((r, c, tr, tc))
-            return moves
-        
-        for r in range(8):
-            for c in range(8):
-                if self.board[r][c] is not None:
-                    for tr in range(8):
-                        for tc in range(8):
-                            if self.is_valid_move((r, c), (tr, tc)):
-                                moves.append((r, c, tr, tc))
-        return moves
+    def movable_mask(self) -> int:
+        mask = self.occupied
+        for (r, c), count in self.move_count.items():
+            if count >= 2:
+                mask &= ~(1 << (r * 8 + c))
+        return mask
+
+    def target_mask(self, piece: Piece) -> int:
+        return self.occupied & ~self.piece_masks[6]
     
     def move_piece(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> bool:
         if not self.is_valid_move(from_pos, to_pos):
             return False
-        r1, c1 = from_pos 
-        r2, c2 = to_pos
-        self.move_count[from_pos] = self.move_count.get(from_pos, 0) + 1
+        from_count = self.move_count.get(from_pos, 0)
+        to_count = self.move_count.get(to_pos, 0)
+        self.move_count[from_pos] = from_count + 1
        
-        self.board[r2][c2] = self.board[r1][c1]
-        self.board[r1][c1] = None
-        self.move_count[(r2, c2)] = self.move_count.pop(from_pos)
+        self.apply_move(from_pos, to_pos)
+        self.move_count[to_pos] = self.move_count.pop(from_pos)
+        from_keys = MOVE_COUNT_KEYS[from_pos[0] * 8 + from_pos[1]]
+        to_keys = MOVE_COUNT_KEYS[to_pos[0] * 8 + to_pos[1]]
+        self.zobrist ^= from_keys[from_count] ^ to_keys[to_count] ^ to_keys[from_count + 1]
         
         return True
 
+    def undo_record(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> tuple:
+        return super().undo_record(from_pos, to_pos) + (self.move_count.get(from_pos), self.move_count.get(to_pos))
+
+    def unmake_move(self, undo: tuple) -> None:
+        super().unmake_move(undo)
+        from_pos, to_pos, from_count, to_count = undo[0], undo[1], undo[4], undo[5]
+        self.move_count.pop(to_pos, None)
+        if from_count is not None:
+            self.move_count[from_pos] = from_count
+        if to_count is not None:
+            self.move_count[to_pos] = to_count
+
 MODE={
     "ranger": {
         "class":ChessRangerBoard,
@@ -194,14 +197,20 @@ MODE={
 } 
  
 class ChessPuzzle:
-    def __init__(self, mode, board_layout: list[list[int]] | dict | None = None):
+    def __init__(self, mode, board_layout: list[list[int]] | dict | State | None = None):
         if mode not in MODE:
             mode = "ranger"
+        self.mode = mode
 
         layout = None
         turn = None
         count = None
-        if isinstance(board_layout, dict):
+        if is_state(board_layout):
+            layout = unpack_board(board_layout)
+            turn = state_turn(board_layout)
+            count = state_move_count(board_layout)
+            self.initial_board_layout = board_layout
+        elif isinstance(board_layout, dict):
             layout = board_layout["board"]
             turn = board_layout.get("turn")
             count= board_layout.get("move_count")
@@ -213,11 +222,13 @@ class ChessPuzzle:
             self.initial_board_layout = board_layout
 
         self.board = MODE[mode]["class"](layout)
+        self.history: list[tuple] = []
 
         if turn is not None and hasattr(self.board, "waiting_turn"):
             self.board.waiting_turn = turn
         if count is not None and hasattr(self.board, "move_count"):
             self.board.move_count = count
+        self.board.update_zobrist()
 
     def step(self, action: tuple[int, int, int, int]):
         success = self.board.move_piece((action[0], action[1]), (action[2], action[3]))
@@ -245,7 +256,22 @@ class ChessPuzzle:
                     info['msg'] = "Dead End"    
         return self.get_observation(), reward, done, info
 
-    def reset(self, board_layout: list[list[int]] | dict | None = None):
+    def push(self, action: tuple[int, int, int, int]) -> bool:
+        """
+        Plays a move in place and remembers how to take it back with pop().
+        Unlike step(), no reward or dead-end check is computed.
+        """
+        from_pos, to_pos = (action[0], action[1]), (action[2], action[3])
+        undo = self.board.undo_record(from_pos, to_pos)
+        if not self.board.move_piece(from_pos, to_pos):
+            return False
+        self.history.append(undo)
+        return True
+
+    def pop(self) -> None:
+        self.board.unmake_move(self.history.pop())
+
+    def reset(self, board_layout: list[list[int]] | dict | State | None = None):
         if board_layout is None:
             board_layout = self.initial_board_layout
             
@@ -253,11 +279,16 @@ class ChessPuzzle:
         turn = None
         count = None
 
-        if isinstance(board_layout, dict):
+        if is_state(board_layout):
+            layout = unpack_board(board_layout)
+            turn = state_turn(board_layout)
+            count = state_move_count(board_layout)
+        elif isinstance(board_layout, dict):
             layout = board_layout["board"]
             turn = board_layout.get("turn")
             count = board_layout.get("move_count")
         self.board.import_board(layout)
+        self.history = []
         
         if turn is not None and hasattr(self.board, "waiting_turn"):
             self.board.waiting_turn = turn
@@ -265,26 +296,65 @@ class ChessPuzzle:
             self.board.waiting_turn = True
         if count is not None and hasattr(self.board, "move_count"):
             self.board.move_count = count
+        self.board.update_zobrist()
 
     def get_observation(self):
+        # numpy is only needed here; importing it lazily keeps solver start-up cheap.
+        import numpy as np
         return np.array(self.board.export_board(), dtype=np.int8)
     
     def export_board_string(self):
         return self.board.export_board_string()
 
-    def get_state(self):
-        return {
-            "board": self.board.export_board(),
-            "turn": getattr(self.board, "waiting_turn", None),
-            "move_count": getattr(self.board, "move_count", None)
-        }
+    def get_state(self) -> State:
+        return self.board.export_state()
 
-    def set_state(self, state):
+    def set_state(self, state: State | dict):
+        if is_state(state):
+            self.board.import_state(state)
+            self.history = []
+            return
         self.board.import_board(state["board"])
+        self.history = []
         if state["turn"] is not None and hasattr(self.board, "waiting_turn"):
             self.board.waiting_turn = state["turn"]
         if state["move_count"] is not None and hasattr(self.board, "move_count"):
             self.board.move_count = copy.deepcopy(state["move_count"])
+        self.board.update_zobrist()
+
+    def get_hash(self) -> int:
+        """Zobrist hash of the current position, kept up to date by every move."""
+        return self.board.zobrist
+
+    def probe_tablebase(self, state: State | None = None) -> bool | None:
+        """
+        Whether the current position can still be solved, answered by the endgame
+        tablebase; pass `state` when it has already been exported. None when no
+        tablebase is built or the position has too many pieces.
+        """
+        table = load_tablebase(self.mode)
+        if table is None or self.board.count_pieces() > table.max_pieces:
+            return None
+        return table.probe(state if state is not None else self.get_state())
+
+    def tablebase_line(self) -> list[tuple[int, int, int, int]] | None:
+        """A winning line from the current position read off the tablebase, or None."""
+        if not self.probe_tablebase():
+            return None
+        line = []
+        while self.board.count_pieces() > 1:
+            for move in self.board.get_all_valid_moves():
+                self.push(move)
+                if self.probe_tablebase():
+                    line.append(move)
+                    break
+                self.pop()
+            else:
+                break
+        solved = self.board.count_pieces() <= 1
+        for _ in line:
+            self.pop()
+        return line if solved else None
 
     def calculate_heuristic(self, state=None) -> int:
         pieces_count = self.board.count_pieces()
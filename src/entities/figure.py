@@ -1,9 +1,40 @@
+from src.entities.attack_tables import *
+from src.entities.state import *
+from src.entities.zobrist import PIECE_KEYS, state_zobrist
+
+def _ray_moves(directions: tuple[tuple[int, int], ...]) -> tuple[tuple[int, int], ...]:
+    return tuple((dr * k, dc * k) for dr, dc in directions for k in range(1, 8))
+
 class Piece:
-    def __init__(self, color: bool = True):
-        self.name: str = "Piece"
-        self.short_name: str = "p"
-        self.color: bool = color
-        self.legal_moves: list[tuple[int, int]] = []
+    """
+    Pieces are immutable flyweights: Pawn(True) always returns the same shared
+    white pawn, so boards hold references to 12 instances at most. Everything
+    except the color is stored on the class.
+    """
+    __slots__ = ("color", "cell")
+    _instances: dict[tuple[type, bool], "Piece"] = {}
+
+    name: str = "Piece"
+    short_name: str = "p"
+    code: int = 0
+    legal_moves: tuple[tuple[int, int], ...] = ()
+
+    def __new__(cls, color: bool = True):
+        key = (cls, bool(color))
+        piece = Piece._instances.get(key)
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, "color", bool(color))
+            # Cell byte of the State layout: piece code plus the black bit.
+            object.__setattr__(piece, "cell", cls.code if color else cls.code | BLACK_FLAG)
+            Piece._instances[key] = piece
+        return piece
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} instances are shared and immutable")
+
+    def __reduce__(self):
+        return (type(self), (self.color,))
         
     def get_name(self) -> str:
         return self.name
@@ -15,68 +46,70 @@ class Piece:
     def get_color(self) -> bool:
         return self.color
     
-    def get_legal_moves(self) -> list[tuple[int, int]]:
+    def get_legal_moves(self) -> tuple[tuple[int, int], ...]:
         return self.legal_moves
     
     def is_legal_move(self, move: tuple[int, int]) -> bool:
         return move in self.legal_moves
     
 class Pawn(Piece):
-    def __init__(self, color: bool = True):
-        super().__init__(color)
-        self.name = "Pawn"
-        self.short_name = "p"
-        if color:
-            self.legal_moves = [(-1, 1), (-1, -1)]
-        else:
-            self.legal_moves = [(1, 1), (1, -1)]
+    __slots__ = ()
+    name = "Pawn"
+    short_name = "p"
+    code = 1
+
+    def get_legal_moves(self) -> tuple[tuple[int, int], ...]:
+        return PAWN_DELTAS[self.color]
+
+    def is_legal_move(self, move: tuple[int, int]) -> bool:
+        return move in PAWN_DELTAS[self.color]
     
 class Knight(Piece):
-    def __init__(self, color: bool = True):
-        super().__init__(color)
-        self.name = "Knight"
-        self.short_name = "n"
-        self.legal_moves = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+    __slots__ = ()
+    name = "Knight"
+    short_name = "n"
+    code = 2
+    legal_moves = KNIGHT_DELTAS
     
     def is_legal_move(self, move: tuple[int, int]) -> bool:
         return move[0] ** 2 + move[1] ** 2 == 5
     
 class Bishop(Piece):
-    def __init__(self, color: bool = True):
-        super().__init__(color)
-        self.name = "Bishop"
-        self.short_name = "b"
-        self.legal_moves = [(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7), (-1, 1), (-2, 2), (-3, 3), (-4, 4), (-5, 5), (-6, 6), (-7, 7), (1, -1), (2, -2), (3, -3), (4, -4), (5, -5), (6, -6), (7, -7), (-1, 1), (-2, 2), (-3, 3), (-4, 4), (-5, 5), (-6, 6), (-7, 7), (-8, 8), (-1, -1), (-2, -2), (-3, -3), (-4, -4), (-5, -5), (-6, -6), (-7, -7)]
+    __slots__ = ()
+    name = "Bishop"
+    short_name = "b"
+    code = 3
+    legal_moves = _ray_moves(DIAGONAL_DIRECTIONS)
 
     def is_legal_move(self, move: tuple[int, int]) -> bool:
         return abs(move[0]) < 8 and abs(move[1]) < 8 and abs(move[0]) == abs(move[1]) and move != (0, 0)
 
 class Rook(Piece):
-    def __init__(self, color: bool = True):
-        super().__init__(color)
-        self.name = "Rook"
-        self.short_name = "r"
-        self.legal_moves = [(1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0), (-1, 0), (-2, 0), (-3, 0), (-4, 0), (-5, 0), (-6, 0), (-7, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, -1), (0, -2), (0, -3), (0, -4), (0, -5), (0, -6), (0, -7)]
+    __slots__ = ()
+    name = "Rook"
+    short_name = "r"
+    code = 4
+    legal_moves = _ray_moves(ORTHOGONAL_DIRECTIONS)
 
     def is_legal_move(self, move: tuple[int, int]) -> bool:
         return move[0]*move[1] == 0 and move != (0, 0)
 
 class Queen(Piece):
-    def __init__(self, color: bool = True):
-        super().__init__(color)
-        self.name = "Queen"
-        self.short_name = "q"
-        self.legal_moves = [(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7), (-1, 1), (-2, 2), (-3, 3), (-4, 4), (-5, 5), (-6, 6), (-7, 7), (1, -1), (2, -2), (3, -3), (4, -4), (5, -5), (6, -6), (7, -7), (-1, 1), (-2, 2), (-3, 3), (-4, 4), (-5, 5), (-6, 6), (-7, 7), (-8, 8), (-1, -1), (-2, -2), (-3, -3), (-4, -4), (-5, -5), (-6, -6), (-7, -7), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0), (-1, 0), (-2, 0), (-3, 0), (-4, 0), (-5, 0), (-6, 0), (-7, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, -1), (0, -2), (0, -3), (0, -4), (0, -5), (0, -6), (0, -7)]
+    __slots__ = ()
+    name = "Queen"
+    short_name = "q"
+    code = 5
+    legal_moves = _ray_moves(DIAGONAL_DIRECTIONS + ORTHOGONAL_DIRECTIONS)
 
     def is_legal_move(self, move: tuple[int, int]) -> bool:
         return abs(move[0]) < 8 and abs(move[1]) < 8 and (abs(move[0]) == abs(move[1]) or move[0]*move[1] == 0) and move != (0, 0)
 
 class King(Piece):
-    def __init__(self, color: bool = True):
-        super().__init__(color)
-        self.name = "King"
-        self.short_name = "k"
-        self.legal_moves = [(1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0)]
+    __slots__ = ()
+    name = "King"
+    short_name = "k"
+    code = 6
+    legal_moves = KING_DELTAS
     
     def is_legal_move(self, move: tuple[int, int]) -> bool:
         return abs(move[0]) < 2 and abs(move[1]) < 2 and move != (0, 0)
@@ -99,11 +132,37 @@ piece_to_int: dict[type[Piece], int] = {
     King: 6
 }
 
+# The 12 shared piece instances, keyed by signed piece value (positive = white).
+PIECES: dict[int, Piece] = {sign * code: piece_class(sign > 0) for code, piece_class in int_to_piece.items() for sign in (1, -1)}
+
+def get_piece(value: int) -> Piece:
+    return PIECES[value]
+
+def square_index(pos: tuple[int, int]) -> int:
+    return pos[0] * 8 + pos[1]
+
+def iter_bits(mask: int):
+    """Yields the square index of every set bit, lowest square first."""
+    while mask:
+        lsb = mask & -mask
+        yield lsb.bit_length() - 1
+        mask ^= lsb
+
 class Board:
+    # Move generation runs on the bitboards; set to False to fall back to the square-pair scan.
+    use_bitboards: bool = True
+
     def __init__(self, board: list[list[int]] = [[0 for _ in range(8)] for _ in range(8)]) -> None:
         self.board: list[list[Piece|None]]
+        self.piece_masks: list[int] = [0] * 7
+        self.color_mask: int = 0
+        self.occupied: int = 0
+        self.zobrist: int = 0
         self.import_board(board)
     
+    def create_piece(self, value: int) -> Piece:
+        return PIECES[value]
+
     def import_board(self, board: list[list[int]]) -> None:
         self.board = []
         for row in board:
@@ -112,8 +171,52 @@ class Board:
                 if piece == 0:
                     self.board[-1].append(None)
                 else:
-                    self.board[-1].append(int_to_piece[abs(piece)](piece > 0))
+                    self.board[-1].append(self.create_piece(piece))
+        self.update_bitboards()
+        self.update_zobrist()
+
+    def update_bitboards(self) -> None:
+        """Rebuilds the per-type masks, the white color mask and the occupancy from self.board."""
+        self.piece_masks = [0] * 7
+        self.color_mask = 0
+        self.occupied = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece is None:
+                    continue
+                bit = 1 << (r * 8 + c)
+                self.piece_masks[piece.code] |= bit
+                if piece.color:
+                    self.color_mask |= bit
+                self.occupied |= bit
     
+    def encode_cells(self) -> bytearray:
+        """Cell bytes and flags of the State layout; mode boards add turn and move counts."""
+        cells = bytearray(STATE_SIZE)
+        for square in iter_bits(self.occupied):
+            cells[square] = self.board[square >> 3][square & 7].cell
+        return cells
+
+    def export_state(self) -> State:
+        return bytes(self.encode_cells())
+
+    def import_state(self, state: State) -> None:
+        self.board = []
+        for r in range(8):
+            self.board.append([])
+            for cell in state[r * 8:r * 8 + 8]:
+                if cell == 0:
+                    self.board[-1].append(None)
+                else:
+                    self.board[-1].append(self.create_piece(decode_piece(cell)))
+        self.update_bitboards()
+        self.update_zobrist()
+
+    def update_zobrist(self) -> None:
+        """Recomputes the hash from scratch; needed after turn or move counts are assigned directly."""
+        self.zobrist = state_zobrist(self.export_state())
+
     def export_board(self) -> list[list[int]]:
         board: list[list[int]] = []
         for row in self.board:
@@ -122,8 +225,7 @@ class Board:
                 if piece is None:
                     board[-1].append(0)
                 else:
-                    val = piece_to_int[type(piece)] 
-                    board[-1].append(val if piece.get_color() else -val)
+                    board[-1].append(piece.code if piece.color else -piece.code)
         return board
     
     def export_board_string(self) -> list[list[str]]:
@@ -138,45 +240,14 @@ class Board:
         return board
 
     def count_pieces(self):
-        count = 0
-        for r in range(8):
-            for c in range(8):
-                if self.board[r][c] is not None:
-                    count += 1
-        return count
+        return self.occupied.bit_count()
     
     def get_board(self) -> list[list[Piece|None]]:
         return self.board
 
     def is_path_clear(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> bool:
-        r1, c1 = from_pos
-        r2, c2 = to_pos
-        
-        piece = self.board[r1][c1]
-        if isinstance(piece, (Knight, King, Pawn)):
-            return True
-        
-        if isinstance(piece, Pawn):
-             if abs(r2 - r1) > 1: # 2-step move
-                 mid_r = (r1 + r2) // 2
-                 if self.board[mid_r][c1] is not None: return False
-             return True
-
-        dr = r2 - r1
-        dc = c2 - c1
-        
-        step_r = 0 if dr == 0 else (1 if dr > 0 else -1)
-        step_c = 0 if dc == 0 else (1 if dc > 0 else -1)
-
-        curr_r, curr_c = r1 + step_r, c1 + step_c
-
-        while (curr_r, curr_c) != (r2, c2):
-            if self.board[curr_r][curr_c] is not None:
-                return False
-            curr_r += step_r
-            curr_c += step_c
-            
-        return True
+        # Knight, king and pawn captures are never aligned with a square in between.
+        return not BETWEEN[square_index(from_pos)][square_index(to_pos)] & self.occupied
 
     def is_valid_move(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> bool:
         """
@@ -198,37 +269,88 @@ class Board:
 
         if piece is None or target is None:
             return False
-        move_delta = (r2 - r1, c2 - c1)
-        if not piece.is_legal_move(move_delta):
+        if not ATTACKS[piece.color][piece.code][r1 * 8 + c1] >> (r2 * 8 + c2) & 1:
             return False
         if not self.is_path_clear(from_pos, to_pos):
             return False
 
         return True
 
+    def toggle_move(self, piece: Piece, target: Piece, from_square: int, to_square: int) -> None:
+        # Every update is an XOR, so the same call applies and reverts a capture.
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+
+        self.piece_masks[target.code] ^= to_bit
+        if target.color:
+            self.color_mask ^= to_bit
+        self.piece_masks[piece.code] ^= from_bit | to_bit
+        if piece.color:
+            self.color_mask ^= from_bit | to_bit
+        self.occupied ^= from_bit
+        self.zobrist ^= PIECE_KEYS[to_square][target.cell] ^ PIECE_KEYS[from_square][piece.cell] ^ PIECE_KEYS[to_square][piece.cell]
+
+    def apply_move(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> None:
+        """Moves the piece onto the captured square, keeping the bitboards and hash in sync."""
+        r1, c1 = from_pos
+        r2, c2 = to_pos
+        piece = self.board[r1][c1]
+        self.toggle_move(piece, self.board[r2][c2], r1 * 8 + c1, r2 * 8 + c2)
+        self.board[r2][c2] = piece
+        self.board[r1][c1] = None
+
+    def undo_record(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> tuple:
+        """Everything unmake_move needs to take back the capture from_pos -> to_pos."""
+        return (from_pos, to_pos, self.board[to_pos[0]][to_pos[1]], self.zobrist)
+
+    def unmake_move(self, undo: tuple) -> None:
+        from_pos, to_pos, captured = undo[0], undo[1], undo[2]
+        r1, c1 = from_pos
+        r2, c2 = to_pos
+        piece = self.board[r2][c2]
+        self.toggle_move(piece, captured, r1 * 8 + c1, r2 * 8 + c2)
+        self.board[r1][c1] = piece
+        self.board[r2][c2] = captured
+        self.zobrist = undo[3]
+
     def move_piece(self, from_pos: tuple[int, int], to_pos: tuple[int, int]) -> bool:
         if self.is_valid_move(from_pos, to_pos):    
-            self.board[to_pos[0]][to_pos[1]] = self.board[from_pos[0]][from_pos[1]]
-            self.board[from_pos[0]][from_pos[1]] = None
+            self.apply_move(from_pos, to_pos)
             return True
         return False
 
+    def movable_mask(self) -> int:
+        """Squares whose piece may move in the current position."""
+        return self.occupied
+
+    def target_mask(self, piece: Piece) -> int:
+        """Squares the given piece may capture on, ignoring its movement pattern."""
+        return self.occupied
+
     def get_all_valid_moves(self, specific_pos=None):
-        moves = []
+        sources = self.movable_mask()
         if specific_pos:
-            r, c = specific_pos
-            if self.board[r][c] is not None:
-                 for tr in range(8):
-                    for tc in range(8):
-                        if self.is_valid_move((r, c), (tr, tc)):
-                            moves.append((r, c, tr, tc))
+            sources &= 1 << square_index(specific_pos)
+
+        moves = []
+        if not self.use_bitboards:
+            for r in range(8):
+                for c in range(8):
+                    if sources >> (r * 8 + c) & 1:
+                        for tr in range(8):
+                            for tc in range(8):
+                                if self.is_valid_move((r, c), (tr, tc)):
+                                    moves.append((r, c, tr, tc))
             return moves
-        
-        for r in range(8):
-            for c in range(8):
-                if self.board[r][c] is not None:
-                    for tr in range(8):
-                        for tc in range(8):
-                            if self.is_valid_move((r, c), (tr, tc)):
-                                moves.append((r, c, tr, tc))
+
+        occupied = self.occupied
+        for square in iter_bits(sources):
+            r, c = square >> 3, square & 7
+            piece = self.board[r][c]
+            between = BETWEEN[square]
+            targets = ATTACKS[piece.color][piece.code][square] & self.target_mask(piece)
+            for target in iter_bits(targets):
+                if between[target] & occupied:
+                    continue
+                moves.append((r, c, target >> 3, target & 7))
         return moves
\ No newline at end of file
@@ -0,0 +1,235 @@
+# Binary puzzle catalogue: every board of a mode in one memory-mapped file, so
+# the game reads piece counts and boards without parsing puzzle_map.json.
+#
+# puzzle_map.json stays the catalogue that is edited and shared; the store is
+# built from it the first time a process asks for the mode, and again whenever
+# the JSON's size or modification time no longer match the ones recorded in the
+# store's header. Export back to JSON with
+# `python -m src.entities.puzzle_store --mode MODE --export PATH`.
+#
+# File layout: a header, one index entry (pieces, boards) per piece count in
+# ascending order, then the boards of each piece count in turn. A board is 64
+# signed bytes, the board values row by row.
+
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+
+PUZZLE_DIR = "data/"
+MODES = ("ranger", "melee", "solo")
+
+MAGIC = b"CRPS"
+FORMAT_VERSION = 1
+# magic, format version, piece counts, size and mtime (ns) of the JSON it was built from
+HEADER = struct.Struct("<4sHHQq")
+# piece count, boards with that many pieces
+INDEX_ENTRY = struct.Struct("<HI")
+BOARD_BYTES = 64
+BOARD = struct.Struct(f"{BOARD_BYTES}b")
+
+Board = list[list[int]]
+
+def puzzle_map_path(mode: str) -> str:
+    return PUZZLE_DIR + f"chess_{mode}/puzzle_map.json"
+
+def store_path(mode: str) -> str:
+    return PUZZLE_DIR + f"chess_{mode}/puzzle_map.bin"
+
+def encode_board(board: Board) -> bytes:
+    if len(board) != 8 or any(len(row) != 8 for row in board):
+        raise ValueError("a board is 8 rows of 8 squares")
+    return BOARD.pack(*(value for row in board for value in row))
+
+def decode_board(data, offset: int = 0) -> Board:
+    cells = BOARD.unpack_from(data, offset)
+    return [list(cells[row * 8:row * 8 + 8]) for row in range(8)]
+
+def build_store(maps: dict[str, list[Board]], source_size: int = 0, source_mtime: int = 0) -> bytes:
+    """The store holding `maps`, in the puzzle_map.json layout {"<pieces>": [board, ...]}."""
+    groups = sorted((int(pieces), boards) for pieces, boards in maps.items() if boards)
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, len(groups), source_size, source_mtime)]
+    parts.extend(INDEX_ENTRY.pack(pieces, len(boards)) for pieces, boards in groups)
+    parts.extend(encode_board(board) for _, boards in groups for board in boards)
+    return b"".join(parts)
+
+class PuzzleStore:
+    """Read-only view of a store, from a memory map or plain bytes."""
+    def __init__(self, data):
+        self.data = data
+        magic, version, groups, self.source_size, self.source_mtime = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a puzzle store of format {FORMAT_VERSION}")
+        # Piece count -> (offset of its first board, number of boards).
+        self.groups: dict[int, tuple[int, int]] = {}
+        offset = HEADER.size + groups * INDEX_ENTRY.size
+        for i in range(groups):
+            pieces, count = INDEX_ENTRY.unpack_from(data, HEADER.size + i * INDEX_ENTRY.size)
+            self.groups[pieces] = (offset, count)
+            offset += count * BOARD_BYTES
+        if offset > len(data):
+            raise ValueError("truncated puzzle store")
+        self.total = sum(count for _, count in self.groups.values())
+
+    @classmethod
+    def open(cls, path: str) -> "PuzzleStore":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def limits(self) -> tuple[int, int] | None:
+        """The fewest and most pieces of any board, or None when there are none."""
+        if not self.groups:
+            return None
+        return min(self.groups), max(self.groups)
+
+    def count(self, pieces: int) -> int:
+        return self.groups.get(pieces, (0, 0))[1]
+
+    def board(self, pieces: int, index: int) -> Board:
+        offset, count = self.groups[pieces]
+        if not 0 <= index < count:
+            raise IndexError(f"no board {index} with {pieces} pieces")
+        return decode_board(self.data, offset + index * BOARD_BYTES)
+
+    def boards(self, pieces: int) -> list[Board]:
+        return [self.board(pieces, index) for index in range(self.count(pieces))]
+
+    def random_board(self, pieces: int | None = None, exclude: Board | None = None, rng=random) -> Board | None:
+        """
+        A board with `pieces` pieces (any board when None) picked at random,
+        other than `exclude` unless it is the only one; None when there is none.
+        """
+        if pieces is None:
+            if not self.total:
+                return None
+            # Boards are stored back to back, so any board is one index away.
+            first = HEADER.size + len(self.groups) * INDEX_ENTRY.size
+            offset, count = first, self.total
+        else:
+            offset, count = self.groups.get(pieces, (0, 0))
+            if not count:
+                return None
+        index = rng.randrange(count)
+        if exclude is not None and count > 1:
+            excluded = encode_board(exclude)
+            start = offset + index * BOARD_BYTES
+            if self.data[start:start + BOARD_BYTES] == excluded:
+                # Draw again from the other boards.
+                other = rng.randrange(count - 1)
+                index = other + (other >= index)
+        return decode_board(self.data, offset + index * BOARD_BYTES)
+
+    def contains(self, board: Board) -> bool:
+        encoded = encode_board(board)
+        pieces = sum(1 for value in encoded if value)
+        offset, count = self.groups.get(pieces, (0, 0))
+        return any(self.data[start:start + BOARD_BYTES] == encoded
+                   for start in range(offset, offset + count * BOARD_BYTES, BOARD_BYTES))
+
+    def to_maps(self) -> dict[str, list[Board]]:
+        """The boards in the puzzle_map.json layout."""
+        return {str(pieces): self.boards(pieces) for pieces in self.groups}
+
+# Stores are opened at most once per process; None marks a mode with no boards file.
+_stores: dict[str, PuzzleStore | None] = {}
+
+def _write(path: str, data: bytes) -> None:
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+def _save_store(mode: str, maps: dict[str, list[Board]], source: os.stat_result) -> PuzzleStore:
+    """Writes and opens the mode's store of `maps`, keeping it in memory when it cannot be written."""
+    data = build_store(maps, source.st_size, source.st_mtime_ns)
+    try:
+        _write(store_path(mode), data)
+        return PuzzleStore.open(store_path(mode))
+    except OSError as e:
+        print(f"Keeping the {mode} puzzle store in memory: {e}", file=sys.stderr)
+        return PuzzleStore(data)
+
+def load_puzzle_store(mode: str) -> PuzzleStore | None:
+    if mode not in _stores:
+        path = store_path(mode)
+        try:
+            source = os.stat(puzzle_map_path(mode))
+        except OSError:
+            source = None
+        store = None
+        try:
+            if os.path.exists(path):
+                store = PuzzleStore.open(path)
+                if source is not None and (store.source_size, store.source_mtime) != (source.st_size, source.st_mtime_ns):
+                    store.close()
+                    store = None
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Rebuilding puzzle store {path}: {e}", file=sys.stderr)
+            store = None
+        if store is None and source is not None:
+            try:
+                with open(puzzle_map_path(mode)) as f:
+                    store = _save_store(mode, json.load(f), source)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Error loading puzzles for {mode}: {e}", file=sys.stderr)
+        _stores[mode] = store
+    return _stores[mode]
+
+def add_puzzle(mode: str, board: Board) -> bool:
+    """
+    Appends `board` to the mode's puzzle_map.json and store; False when the
+    catalogue already has it.
+    """
+    store = load_puzzle_store(mode)
+    if store is not None and store.contains(board):
+        return False
+    maps = store.to_maps() if store is not None else {}
+    maps.setdefault(str(sum(1 for row in board for value in row if value)), []).append(board)
+
+    path = puzzle_map_path(mode)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unmapped first, as Windows will not replace a mapped file; if a write
+    # fails, the next load_puzzle_store starts again from the files.
+    if store is not None:
+        store.close()
+    del _stores[mode]
+    _write(path, json.dumps(maps).encode())
+    _stores[mode] = _save_store(mode, maps, os.stat(path))
+    return True
+
+def export_json(mode: str, path: str) -> int:
+    """Writes the mode's boards to `path` in the puzzle_map.json layout; returns the number of boards."""
+    store = load_puzzle_store(mode)
+    maps = store.to_maps() if store is not None else {}
+    with open(path, "w") as f:
+        json.dump(maps, f)
+    return store.total if store is not None else 0
+
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the binary puzzle stores from each mode's puzzle_map.json, or export one back to JSON.")
+    parser.add_argument("--mode", choices=MODES, action="append",
+                        help="mode to build (repeatable, default: all)")
+    parser.add_argument("--export", metavar="PATH", help="write the mode's boards to PATH as JSON (needs a single --mode)")
+    args = parser.parse_args(argv)
+
+    modes = args.mode or list(MODES)
+    if args.export:
+        if len(modes) != 1:
+            parser.error("--export needs exactly one --mode")
+        print(f"Wrote {export_json(modes[0], args.export)} boards to {args.export}")
+        return
+    for mode in modes:
+        store = load_puzzle_store(mode)
+        if store is None:
+            print(f"{mode}: no puzzles")
+        else:
+            print(f"{mode}: {store.total} boards, {len(store.groups)} piece counts in {store_path(mode)}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
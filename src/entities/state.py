@@ -0,0 +1,79 @@
+# Compact, immutable puzzle state.
+#
+# A state is a plain 65-byte `bytes` value, so it hashes and compares at C speed
+# and costs under 100 bytes to keep around:
+#   bytes 0..63  one cell per square (row * 8 + col):
+#                bits 0-2 piece code (0 = empty), bit 3 set for black,
+#                bits 4-5 solo move count
+#   byte 64      flags: bit 0 white to move, bit 1 turn is tracked,
+#                bit 2 move counts are tracked
+
+State = bytes
+
+STATE_SIZE = 65
+FLAGS_INDEX = 64
+
+PIECE_MASK = 0b0111
+BLACK_FLAG = 0b1000
+COUNT_SHIFT = 4
+
+WHITE_TO_MOVE_FLAG = 0b001
+HAS_TURN_FLAG = 0b010
+HAS_MOVE_COUNT_FLAG = 0b100
+
+def encode_piece(value: int) -> int:
+    """Cell byte for a signed piece value (positive = white)."""
+    return value if value > 0 else -value | BLACK_FLAG
+
+def decode_piece(cell: int) -> int:
+    """Signed piece value for a cell byte."""
+    code = cell & PIECE_MASK
+    return -code if cell & BLACK_FLAG else code
+
+def encode_flags(turn: bool | None, move_count: dict | None) -> int:
+    flags = 0
+    if turn is not None:
+        flags |= HAS_TURN_FLAG
+        if turn:
+            flags |= WHITE_TO_MOVE_FLAG
+    if move_count is not None:
+        flags |= HAS_MOVE_COUNT_FLAG
+    return flags
+
+def pack_state(board: list[list[int]], turn: bool | None = None, move_count: dict | None = None) -> State:
+    cells = bytearray(STATE_SIZE)
+    for r in range(8):
+        for c in range(8):
+            if board[r][c] != 0:
+                cells[r * 8 + c] = encode_piece(board[r][c])
+    if move_count is not None:
+        for (r, c), count in move_count.items():
+            if count > 0 and cells[r * 8 + c]:
+                cells[r * 8 + c] |= count << COUNT_SHIFT
+    cells[FLAGS_INDEX] = encode_flags(turn, move_count)
+    return bytes(cells)
+
+def is_state(value) -> bool:
+    return isinstance(value, bytes) and len(value) == STATE_SIZE
+
+def unpack_board(state: State) -> list[list[int]]:
+    return [[decode_piece(cell) for cell in state[r * 8:r * 8 + 8]] for r in range(8)]
+
+def state_turn(state: State) -> bool | None:
+    flags = state[FLAGS_INDEX]
+    if not flags & HAS_TURN_FLAG:
+        return None
+    return bool(flags & WHITE_TO_MOVE_FLAG)
+
+def state_move_count(state: State) -> dict[tuple[int, int], int] | None:
+    if not state[FLAGS_INDEX] & HAS_MOVE_COUNT_FLAG:
+        return None
+    return {(square >> 3, square & 7): cell >> COUNT_SHIFT for square, cell in enumerate(state[:64]) if cell}
+
+def state_to_dict(state: State) -> dict:
+    """The legacy {"board", "turn", "move_count"} form."""
+    return {
+        "board": unpack_board(state),
+        "turn": state_turn(state),
+        "move_count": state_move_count(state)
+    }
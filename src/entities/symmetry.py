@@ -0,0 +1,110 @@
+# Board symmetries the capture rules respect.
+#
+# Knights, bishops, rooks, queens and kings attack alike under all 8 symmetries
+# of the square (the rotations and reflections of the dihedral group D4), and
+# sliders are blocked the same way in every direction. Pawns only capture
+# forward, so with a pawn on the board the left-right mirror is all that is
+# left. No other rule depends on where a square is, so a position and its image
+# are equally solvable, by the images of the same moves. Captures only ever
+# remove pieces: the symmetries of a root hold for every position below it.
+#
+# Symmetries are numbered 0-7, 0 being the identity and 1 the left-right mirror.
+
+from src.entities.state import *
+from src.entities.zobrist import PIECE_KEYS, MOVE_COUNT_KEYS, TURN_KEY
+
+PAWN_CODE = 1
+
+_TRANSFORMS = (
+    lambda r, c: (r, c),
+    lambda r, c: (r, 7 - c),
+    lambda r, c: (7 - r, c),
+    lambda r, c: (7 - r, 7 - c),
+    lambda r, c: (c, r),
+    lambda r, c: (c, 7 - r),
+    lambda r, c: (7 - c, r),
+    lambda r, c: (7 - c, 7 - r),
+)
+
+IDENTITY: tuple[int, ...] = (0,)
+MIRROR: tuple[int, ...] = (0, 1)
+D4: tuple[int, ...] = tuple(range(8))
+
+# SQUARE_MAPS[t][square]: the square symmetry t sends `square` to.
+SQUARE_MAPS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(r * 8 + c for r, c in (transform(*divmod(square, 8)) for square in range(64)))
+    for transform in _TRANSFORMS)
+# INVERSES[t]: the symmetry that undoes t.
+INVERSES: tuple[int, ...] = tuple(
+    next(u for u in D4 if all(SQUARE_MAPS[u][SQUARE_MAPS[t][square]] == square for square in range(64)))
+    for t in D4)
+# CELL_KEYS[square][cell]: what a whole cell byte on `square` adds to state_zobrist.
+CELL_KEYS: list[list[int]] = [[PIECE_KEYS[square][cell & 0x0F] ^ MOVE_COUNT_KEYS[square][cell >> COUNT_SHIFT]
+                               for cell in range(1 << (COUNT_SHIFT + 2))] for square in range(64)]
+
+def symmetry_group(state: State) -> tuple[int, ...]:
+    """The symmetries that hold for the pieces of `state`."""
+    for square in range(64):
+        if state[square] & PIECE_MASK == PAWN_CODE:
+            return MIRROR
+    return D4
+
+def stabilizer(state: State) -> tuple[int, ...]:
+    """
+    The symmetries of the state's pieces that leave it unchanged. They map every
+    position reachable from `state` onto another reachable one.
+    """
+    return tuple(t for t in symmetry_group(state) if transform_state(state, t) == state)
+
+def transform_move(move: tuple[int, int, int, int], t: int) -> tuple[int, int, int, int]:
+    transform = _TRANSFORMS[t]
+    return (*transform(move[0], move[1]), *transform(move[2], move[3]))
+
+def transform_state(state: State, t: int) -> State:
+    cells = bytearray(STATE_SIZE)
+    cells[FLAGS_INDEX] = state[FLAGS_INDEX]
+    square_map = SQUARE_MAPS[t]
+    for square in range(64):
+        if state[square]:
+            cells[square_map[square]] = state[square]
+    return bytes(cells)
+
+def symmetric_hashes(state: State, group: tuple[int, ...]) -> list[int]:
+    """state_zobrist of each image of `state`, in group order."""
+    occupied = [(square, state[square]) for square in range(64) if state[square]]
+    flags = state[FLAGS_INDEX]
+    turn_key = TURN_KEY if flags & HAS_TURN_FLAG and flags & WHITE_TO_MOVE_FLAG else 0
+    hashes = []
+    for t in group:
+        square_map = SQUARE_MAPS[t]
+        key = turn_key
+        for square, cell in occupied:
+            key ^= CELL_KEYS[square_map[square]][cell]
+        hashes.append(key)
+    return hashes
+
+def child_hashes(hashes: list[int], group: tuple[int, ...], state: State, move: tuple[int, int, int, int]) -> list[int]:
+    """symmetric_hashes after playing the capture `move` in `state`, from the hashes of `state`."""
+    from_square = move[0] * 8 + move[1]
+    to_square = move[2] * 8 + move[3]
+    moving = state[from_square]
+    captured = state[to_square]
+    flags = state[FLAGS_INDEX]
+    moved = moving + (1 << COUNT_SHIFT) if flags & HAS_MOVE_COUNT_FLAG else moving
+    turn_key = TURN_KEY if flags & HAS_TURN_FLAG else 0
+    children = []
+    for key, t in zip(hashes, group):
+        square_map = SQUARE_MAPS[t]
+        from_keys, to_keys = CELL_KEYS[square_map[from_square]], CELL_KEYS[square_map[to_square]]
+        children.append(key ^ from_keys[moving] ^ to_keys[captured] ^ to_keys[moved] ^ turn_key)
+    return children
+
+def canonical_transform(state: State, group: tuple[int, ...] | None = None) -> int:
+    """
+    The symmetry taking `state` to its canonical image, the one with the lowest
+    hash; `group` defaults to the symmetries of the state's own pieces.
+    """
+    if group is None:
+        group = symmetry_group(state)
+    hashes = symmetric_hashes(state, group)
+    return group[hashes.index(min(hashes))]
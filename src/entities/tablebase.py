@@ -0,0 +1,213 @@
+# Endgame tablebase: for every position with at most K pieces, whether it can
+# still be cleared down to a single piece.
+#
+# Every move removes exactly one piece, so a k-piece position is always k - 1
+# moves from the end and only the solvable bit is worth storing. Layers are built
+# upwards from the one-piece positions (all solved): a k-piece position is
+# solvable when one of its captures leads to a solvable (k - 1)-piece position.
+#
+# Build offline with `python -m src.entities.tablebase [--mode MODE] [--max-pieces K]`.
+# Each mode gets one file under data/tablebase/: a header, then one bitset per
+# layer. Position index within layer k:
+#   ((rank(squares) * A**k + cell digits) * T + turn)
+# squares ascending, rank their colex combination rank, one base-A digit per
+# piece in square order (A = number of distinct cells in the mode) and T = 2
+# when the side to move is part of the position (melee), else 1.
+
+import mmap
+import os
+import struct
+import sys
+import time
+from itertools import combinations, product
+from math import comb
+
+from src.entities.attack_tables import ATTACKS, BETWEEN
+from src.entities.state import *
+
+TABLEBASE_DIR = "data/tablebase/"
+DEFAULT_MAX_PIECES: dict[str, int] = {"ranger": 3, "melee": 2, "solo": 2}
+
+MAGIC = b"CRTB"
+FORMAT_VERSION = 1
+# magic, format version, max pieces, alphabet size, turn states
+HEADER = struct.Struct("<4sHHHH")
+
+KING_CODE = 6
+SOLO_MOVE_LIMIT = 2
+
+class TablebaseRules:
+    """The capture rules of one mode, over cell digits instead of boards."""
+    def __init__(self, mode: str):
+        if mode == "melee":
+            self.cells = [code | black for black in (0, BLACK_FLAG) for code in range(1, 7)]
+            self.turns = 2
+        elif mode == "solo":
+            self.cells = [code | count << COUNT_SHIFT for count in range(SOLO_MOVE_LIMIT + 1) for code in range(1, 7)]
+            self.turns = 1
+        else:
+            self.cells = list(range(1, 7))
+            self.turns = 1
+        self.mode = mode
+        self.digit = {cell: digit for digit, cell in enumerate(self.cells)}
+
+    def attacks(self, cell: int, from_square: int) -> int:
+        return ATTACKS[not cell & BLACK_FLAG][cell & PIECE_MASK][from_square]
+
+    def allowed(self, mover: int, target: int, turn: int) -> bool:
+        """Whether `mover` may capture `target` with `turn` to move (1 = white, melee only)."""
+        if self.mode == "melee":
+            white = not mover & BLACK_FLAG
+            return white == bool(turn) and white == bool(target & BLACK_FLAG)
+        if self.mode == "solo":
+            return mover >> COUNT_SHIFT < SOLO_MOVE_LIMIT and target & PIECE_MASK != KING_CODE
+        return True
+
+    def result(self, mover: int) -> int:
+        """Cell left on the target square."""
+        return mover + (1 << COUNT_SHIFT) if self.mode == "solo" else mover
+
+    def next_turn(self, turn: int) -> int:
+        return 1 - turn if self.turns == 2 else turn
+
+def _rank(squares) -> int:
+    """Colex rank of an ascending square combination."""
+    return sum(comb(square, i + 1) for i, square in enumerate(squares))
+
+def layer_size(k: int, alphabet: int, turns: int) -> int:
+    """Number of positions (bits) in layer k."""
+    return comb(64, k) * alphabet ** k * turns
+
+def _build_layer(rules: TablebaseRules, k: int, prev: bytearray) -> bytearray:
+    A, T = len(rules.cells), rules.turns
+    bits = bytearray((layer_size(k, A, T) + 7) >> 3)
+    weights = [A ** (k - 1 - m) for m in range(k)]
+    child_weights = [A ** (k - 2 - m) for m in range(k - 1)]
+    # attackers[from][to]: digits of the cells that attack `to` from `from` on an empty board.
+    attackers = [[[d for d, cell in enumerate(rules.cells) if rules.attacks(cell, f) >> t & 1] for t in range(64)] for f in range(64)]
+    legal = [[[rules.allowed(mover, target, turn) for turn in range(T)] for target in rules.cells] for mover in rules.cells]
+    results = [rules.digit.get(rules.result(cell)) for cell in rules.cells]
+
+    for squares in combinations(range(64), k):
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+        base = _rank(squares) * A ** k
+        for i in range(k):
+            for j in range(k):
+                if i == j or BETWEEN[squares[i]][squares[j]] & occupied:
+                    continue
+                movers = attackers[squares[i]][squares[j]]
+                if not movers:
+                    continue
+                child_base = _rank(squares[:i] + squares[i + 1:]) * A ** (k - 1)
+                jpos = j - (j > i)
+                others = [m for m in range(k) if m != i and m != j]
+                other_weights = [weights[m] for m in others]
+                other_child_weights = [child_weights[m - (m > i)] for m in others]
+                for a in movers:
+                    r = results[a]
+                    if r is None:
+                        continue
+                    for b in range(A):
+                        for turn in range(T):
+                            if not legal[a][b][turn]:
+                                continue
+                            next_turn = rules.next_turn(turn)
+                            for rest in product(range(A), repeat=k - 2):
+                                child = child_base + r * child_weights[jpos]
+                                index = base + a * weights[i] + b * weights[j]
+                                for digit, w, cw in zip(rest, other_weights, other_child_weights):
+                                    child += digit * cw
+                                    index += digit * w
+                                child = child * T + next_turn
+                                if prev[child >> 3] >> (child & 7) & 1:
+                                    index = index * T + turn
+                                    bits[index >> 3] |= 1 << (index & 7)
+    return bits
+
+def build_tablebase(mode: str, max_pieces: int, log=print) -> bytes:
+    rules = TablebaseRules(mode)
+    A, T = len(rules.cells), rules.turns
+    layer = bytearray(b"\xff" * ((layer_size(1, A, T) + 7) >> 3))
+    layers = [layer]
+    for k in range(2, max_pieces + 1):
+        start = time.time()
+        layer = _build_layer(rules, k, layer)
+        layers.append(layer)
+        log(f"{mode}: {k} pieces, {layer_size(k, A, T)} positions in {time.time() - start:.1f}s")
+    return HEADER.pack(MAGIC, FORMAT_VERSION, max_pieces, A, T) + b"".join(layers)
+
+def tablebase_path(mode: str) -> str:
+    return TABLEBASE_DIR + f"chess_{mode}.tb"
+
+class Tablebase:
+    """Read-only, memory-mapped view of one mode's tablebase file."""
+    def __init__(self, mode: str, path: str):
+        self.rules = TablebaseRules(mode)
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_pieces, alphabet, turns = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != FORMAT_VERSION or alphabet != len(self.rules.cells) or turns != self.rules.turns:
+            raise ValueError(f"{path} is not a {mode} tablebase of format {FORMAT_VERSION}")
+        # Byte offset of each layer, indexed by piece count.
+        self.offsets = [0, HEADER.size]
+        for k in range(1, self.max_pieces):
+            self.offsets.append(self.offsets[-1] + ((layer_size(k, alphabet, turns) + 7) >> 3))
+
+    def probe(self, state: State) -> bool | None:
+        """Whether the position can still be solved; None when it is not covered."""
+        squares = []
+        digits = 0
+        A = len(self.rules.cells)
+        for square in range(64):
+            cell = state[square]
+            if cell:
+                digit = self.rules.digit.get(cell)
+                if digit is None or len(squares) == self.max_pieces:
+                    return None
+                squares.append(square)
+                digits = digits * A + digit
+        k = len(squares)
+        if k == 0:
+            return None
+        turn = state[FLAGS_INDEX] & WHITE_TO_MOVE_FLAG if self.rules.turns == 2 else 0
+        index = (_rank(squares) * A ** k + digits) * self.rules.turns + turn
+        return bool(self.data[self.offsets[k] + (index >> 3)] >> (index & 7) & 1)
+
+# Tables are opened at most once per process; None marks a mode with no file.
+_tablebases: dict[str, Tablebase | None] = {}
+
+def load_tablebase(mode: str) -> Tablebase | None:
+    if mode not in _tablebases:
+        path = tablebase_path(mode)
+        table = None
+        if os.path.exists(path):
+            try:
+                table = Tablebase(mode, path)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Ignoring tablebase {path}: {e}", file=sys.stderr)
+        _tablebases[mode] = table
+    return _tablebases[mode]
+
+def main(argv: list[str] | None = None) -> None:
+    # Imported here: solvers load this module and should not pay for the CLI.
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the endgame tablebases under " + TABLEBASE_DIR)
+    parser.add_argument("--mode", choices=sorted(DEFAULT_MAX_PIECES), action="append",
+                        help="mode to build (repeatable, default: all)")
+    parser.add_argument("--max-pieces", type=int, help="largest piece count to cover (default: per mode)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(TABLEBASE_DIR, exist_ok=True)
+    for mode in args.mode or sorted(DEFAULT_MAX_PIECES):
+        max_pieces = args.max_pieces or DEFAULT_MAX_PIECES[mode]
+        data = build_tablebase(mode, max_pieces)
+        path = tablebase_path(mode)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        print(f"Wrote {path} ({len(data)} bytes)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
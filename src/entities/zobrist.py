@@ -0,0 +1,25 @@
+import random
+
+from src.entities.state import *
+
+# Fixed seed so hashes are stable between runs and across processes.
+_rng = random.Random(0x5EED_C4E55)
+
+# PIECE_KEYS[square][cell], cell being the low nibble of a State cell (piece code | BLACK_FLAG).
+PIECE_KEYS: list[list[int]] = [[0] + [_rng.getrandbits(64) for _ in range(15)] for _ in range(64)]
+# MOVE_COUNT_KEYS[square][count] for solo move counts; a count of 0 hashes as nothing.
+MOVE_COUNT_KEYS: list[list[int]] = [[0] + [_rng.getrandbits(64) for _ in range(3)] for _ in range(64)]
+# XORed in while white is to move in modes that track the turn.
+TURN_KEY: int = _rng.getrandbits(64)
+
+def state_zobrist(state: State) -> int:
+    """64-bit Zobrist hash of a State; boards keep the same value up to date incrementally."""
+    key = 0
+    for square in range(64):
+        cell = state[square]
+        if cell:
+            key ^= PIECE_KEYS[square][cell & 0x0F] ^ MOVE_COUNT_KEYS[square][cell >> COUNT_SHIFT]
+    flags = state[FLAGS_INDEX]
+    if flags & HAS_TURN_FLAG and flags & WHITE_TO_MOVE_FLAG:
+        key ^= TURN_KEY
+    return key
@@ -20,8 +20,13 @@ class SceneManager:
     def switch_scene(self, scene_name, *args, **kwargs):
         """Logic to handle scene transitions"""
         if scene_name in SCENES:
+            self.active_scene.on_exit()
             self.active_scene = SCENES[scene_name](self, *args, **kwargs)
 
+    def close(self):
+        """Lets the active scene clean up before the game quits"""
+        self.active_scene.on_exit()
+
     def run(self, event_list):
         """Delegates the loop to the active scene"""
         self.active_scene.update(event_list)
@@ -7,9 +7,11 @@ from src.scenes.scene import Scene
 from src.ui.element import *
 from settings import *
 from src.utils.asset_loading import load_images, colorize_image
-from src.entities.figure import int_to_piece
+from src.entities.figure import get_piece
 from src.entities.chess import ChessPuzzle
 from src.algorithms.Astar import AStarSolver
+from src.algorithms.solution_cache import solution_cache
+from src.entities.puzzle_store import add_puzzle
 
 MODE_LIST = ["ranger", "melee", "solo"]
 ONLY_WHITE_MODE_LIST = ["ranger", "solo"]
@@ -219,9 +221,7 @@ class MapCreatorScene(Scene):
         self.feedback.draw(screen)
 
         if self.drag_piece_code is not None:
-            piece_cls = int_to_piece[abs(self.drag_piece_code)]
-            p_obj = piece_cls(self.drag_piece_code > 0)
-            img_key = p_obj.get_short_name()
+            img_key = get_piece(self.drag_piece_code).get_short_name()
             if img_key in self.images:
                 img = self.images[img_key]
                 rect = img.get_rect(center=pygame.mouse.get_pos())
@@ -265,9 +265,7 @@ class MapCreatorScene(Scene):
 
                 code = display_grid[r][c]
                 if code != 0:
-                    piece_cls = int_to_piece[abs(code)]
-                    p_obj = piece_cls(code > 0)
-                    img_key = p_obj.get_short_name()
+                    img_key = get_piece(code).get_short_name()
                     if img_key in self.images:
                         screen.blit(self.images[img_key], (x, y))
 
@@ -304,9 +302,7 @@ class MapCreatorScene(Scene):
                     rect = self.trash_icon.get_rect(center=(x + col_width//2, y + row_height//2))
                     screen.blit(self.trash_icon, rect)
                 else:
-                    piece_cls = int_to_piece[abs(code)]
-                    p_obj = piece_cls(code > 0)
-                    img_key = p_obj.get_short_name()
+                    img_key = get_piece(code).get_short_name()
                     if img_key in self.palette_images:
                         img = self.palette_images[img_key]
                         rect = img.get_rect(center=(x + col_width//2, y + row_height//2))
@@ -371,17 +367,23 @@ class MapCreatorScene(Scene):
         
         try:
             env = ChessPuzzle(self.mode, self.board_data)
-            solver = AStarSolver(env)
-            steps = 0
-            solved = False
-            while steps < 50000:
-                state, move = solver.take_action()
-                if solver.solution_found:
-                    solved = True
-                    break
-                if state is None and move is None:
-                    break 
-                steps += 1
+            start_state = env.get_state()
+            # Small boards are answered by the endgame tablebase, and boards solved before by the cache, without searching.
+            solved = env.probe_tablebase()
+            if solved is None and solution_cache().get(self.mode, AStarSolver.__name__, start_state) is not None:
+                solved = True
+            if solved is None:
+                solver = AStarSolver(env, budget=search_budget())
+                while True:
+                    state, move = solver.take_action()
+                    if state is None and move is None:
+                        break
+                solved = solver.solution_found
+                if solver.stop_reason is not None:
+                    self.feedback.show("Search limit reached!", True)
+                    return
+                if solved:
+                    solution_cache().put(self.mode, AStarSolver.__name__, start_state, solver.get_final_path())
             
             if not solved:
                 self.feedback.show("Map is Unsolvable!", True)
@@ -392,25 +394,7 @@ class MapCreatorScene(Scene):
             self.feedback.show("Error checking map!", True)
             return
 
-        folder = f"chess_{self.mode}"
-        filepath = DATA_URL + f'{folder}/puzzle_map.json'
-        
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        data = {}
-        if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                try: data = json.load(f)
-                except: data = {}
-        
-        key = str(count)
-        if key not in data:
-            data[key] = []
-                
-        if self.board_data not in data[key]:
-            data[key].append(self.board_data)
-            with open(filepath, 'w') as f:
-                json.dump(data, f)
+        if add_puzzle(self.mode, self.board_data):
             self.feedback.show(f"Saved! ({count} pieces)")
         else:
             self.feedback.show("Map already exists!", True)
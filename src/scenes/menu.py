@@ -8,7 +8,8 @@ from src.scenes.scene import Scene
 from src.ui.element import *
 from settings import *
 from src.utils.asset_loading import load_images
-from src.entities.figure import int_to_piece
+from src.entities.figure import get_piece
+from src.entities.puzzle_store import load_puzzle_store
 
 class MenuScene(Scene):
     def __init__(self, manager):
@@ -73,17 +74,9 @@ class MenuScene(Scene):
         self.manager.switch_scene('puzzle', mode, starting_map)
 
     def load_maps(self, mode):
-        all_maps = []
-        try:
-            path = DATA_URL + f'chess_{mode}/puzzle_map.json'
-            if os.path.exists(path):
-                with open(path, 'r') as f:
-                    data = json.load(f)
-                    for key in data:
-                        all_maps.extend(data[key])
-        except Exception as e:
-            print(f"Error loading maps for preview: {e}")
-        return all_maps
+        """The mode's puzzle store; previews are drawn from it as they are needed."""
+        store = load_puzzle_store(mode)
+        return store if store is not None and store.total else None
 
     def update(self, event_list):
         mouse_pos = pygame.mouse.get_pos()
@@ -99,11 +92,11 @@ class MenuScene(Scene):
             self.hovered_mode = target_mode
             
             if target_mode == "ranger" and self.ranger_maps:
-                self.current_preview_map = random.choice(self.ranger_maps)
+                self.current_preview_map = self.ranger_maps.random_board()
             elif target_mode == "melee" and self.melee_maps:
-                self.current_preview_map = random.choice(self.melee_maps)
+                self.current_preview_map = self.melee_maps.random_board()
             elif target_mode == "solo" and self.solo_maps:  # 👈 THÊM MỚI
-                self.current_preview_map = random.choice(self.solo_maps)
+                self.current_preview_map = self.solo_maps.random_board()
             else:
                 self.current_preview_map = None
 
@@ -146,9 +139,7 @@ class MenuScene(Scene):
                 
                 code = self.current_preview_map[r][c]
                 if code != 0:
-                    piece_cls = int_to_piece[abs(code)]
-                    p_obj = piece_cls(code > 0)
-                    img_key = p_obj.get_short_name()
+                    img_key = get_piece(code).get_short_name()
                     if img_key in self.preview_images:
                         screen.blit(self.preview_images[img_key], (x, y))
 
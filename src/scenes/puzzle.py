@@ -12,6 +12,7 @@ from src.utils.asset_loading import load_images, get_puzzle_limits, colorize_ima
 from src.ui.element import *
 from src.ui.algorithm_handler import AlgorithmHandler
 from src.entities.chess import ChessPuzzle
+from src.entities.puzzle_store import load_puzzle_store
 
 def darken_image(image_surface, factor=0.5):
     dark_surface = image_surface.copy()
@@ -37,22 +38,15 @@ class PuzzleLogic:
         self.current_num_of_pieces = num
         
         try:
-            with open(DATA_URL + f'chess_{self.mode}/puzzle_map.json') as json_data:
-                map_list = json.load(json_data).get(str(num), [])
-            
-            if not map_list:
+            store = load_puzzle_store(self.mode)
+            new_map = store.random_board(num, exclude=self.puzzle.board.export_board()) if store is not None else None
+
+            if new_map is None:
                 blank_board = [[0 for _ in range(8)] for _ in range(8)]
                 self.puzzle.reset(blank_board)
                 self.initial_board_layout = blank_board
                 return True
 
-            new_map = self.puzzle.board.export_board()
-            if len(map_list) > 1:
-                while new_map == self.puzzle.board.export_board():
-                    new_map = random.choice(map_list)
-            else:
-                new_map = map_list[0]
-
             self.puzzle.reset(new_map)
             self.initial_board_layout = new_map
             return True
@@ -63,14 +57,12 @@ class PuzzleLogic:
 
     def change_map(self):
         try:
-            with open(DATA_URL + f'chess_{self.mode}/puzzle_map.json') as json_data:
-                map_list = json.load(json_data).get(str(self.current_num_of_pieces), [])
-            if not map_list: return
-            new_map = self.puzzle.board.export_board()
-            if len(map_list) == 1 and map_list[0] == new_map:
+            store = load_puzzle_store(self.mode)
+            if store is None: return
+            current_map = self.puzzle.board.export_board()
+            new_map = store.random_board(self.current_num_of_pieces, exclude=current_map)
+            if new_map is None or new_map == current_map:
                 return
-            while new_map == self.puzzle.board.export_board():
-                new_map = random.choice(map_list)
             self.puzzle.reset(new_map)
             self.initial_board_layout = copy.deepcopy(new_map)
         except Exception as e:
@@ -81,42 +73,48 @@ class PuzzleLogic:
 
     def solver_iterator(self, scene, algorithm_class):
         temp_env = ChessPuzzle(self.mode, self.puzzle.get_state())
-        solver = algorithm_class(temp_env)
+        solver = algorithm_class(temp_env, settings.SEARCH_STATS_TIMING, settings.search_budget(timed=not settings.SEARCH_ANIMATION))
         iterations = 0
-        max_frontier_size = 0
         compute_time = 0.0
         
-        while True:
-            start_t = time.perf_counter()
-            state, move = solver.take_action()
-            compute_time += (time.perf_counter() - start_t)
-
-            current_frontier = 0
-            if hasattr(solver, 'pq'):
-                current_frontier = len(solver.pq)
-            elif hasattr(solver, 'queue'):
-                current_frontier = len(solver.queue)
-            elif hasattr(solver, 'stack'):
-                current_frontier = len(solver.stack)
-            if current_frontier > max_frontier_size:
-                max_frontier_size = current_frontier
-
-            if state is None and move is None:
-                break
-            
-            if settings.SEARCH_ANIMATION:
-                self.puzzle.set_state(state)
-                scene.trigger_move((move[0], move[1]), (move[2], move[3]), settings.SEARCH_ANIMATION_DURATION)
-            
-            iterations += 1
-            if iterations > 50000:
-                yield ("error", "Timeout") 
-                break
-            yield ("running", (iterations, max_frontier_size, compute_time)) 
+        try:
+            finished = False
+            while not finished:
+                # Without animation, keep expanding until this frame's compute budget is spent.
+                frame_start = time.perf_counter()
+                frame_budget = settings.SEARCH_FRAME_BUDGET / 1000
+                while True:
+                    start_t = time.perf_counter()
+                    state, move = solver.take_action()
+                    end_t = time.perf_counter()
+                    compute_time += (end_t - start_t)
+
+                    if state is None and move is None:
+                        finished = True
+                        break
+                
+                    iterations += 1
+                    if settings.SEARCH_ANIMATION:
+                        self.puzzle.set_state(state)
+                        scene.trigger_move((move[0], move[1]), (move[2], move[3]), settings.SEARCH_ANIMATION_DURATION)
+                        break
+                    if end_t - frame_start >= frame_budget:
+                        break
+
+                progress = dict(solver.get_stats().as_dict(), steps=iterations, compute_time=compute_time)
+                if finished:
+                    # The last batch may be the only one; report its totals before the result.
+                    yield ("running", progress)
+                    break
+                yield ("running", progress) 
+        finally:
+            solver.close()
 
         self.reset()
         if solver.solution_found:
-            yield ("finished", solver)
+            yield ("finished", solver.get_final_path())
+        elif solver.stop_reason is not None:
+            yield (solver.stop_reason, None)
         else:
             yield ("failed", [])
 
@@ -135,7 +133,6 @@ class PuzzleScene(Scene):
         self.update_screen() 
         
         self.mode = mode
-        self.MIN_NUM_PIECES, self.MAX_NUM_PIECES = get_puzzle_limits(mode)
         
         self.drag_piece = None
         self.drag_origin = None
@@ -143,6 +140,7 @@ class PuzzleScene(Scene):
         self.valid_moves = []
         self.mouse_pos = (0, 0)
         self.logic = PuzzleLogic(mode, self.SQUARE_SIZE, initial_map)
+        self.MIN_NUM_PIECES, self.MAX_NUM_PIECES = self.logic.MIN_NUM_PIECES, self.logic.MAX_NUM_PIECES
 
         self.animating = False
         self.anim_piece = None      
@@ -239,6 +237,18 @@ class PuzzleScene(Scene):
         self.dfs_search_btn = ClickableImage(APP_IMG_URL + "search.png", search_x, self.dfs_y + btn_y_offset, (icon_dim, icon_dim), action=lambda: self.handle_search("DFS"), func = lambda image: colorize_image(image, COLOR_DARK))
         self.dfs_play_btn = ClickableImage(APP_IMG_URL + "play.png", play_x, self.dfs_y + btn_y_offset, (icon_dim, icon_dim), action=lambda: self.start_solution_playback("DFS"), func = lambda image: colorize_image(image, COLOR_DARK))
 
+        # Parallel
+        self.parallel_y = algo_start_y + algo_row_h * 3
+        self.parallel_label = LabelBox("Parallel DFS", btn_x, self.parallel_y, label_w, label_h, font_size=algo_label_font_size)
+        self.parallel_search_btn = ClickableImage(APP_IMG_URL + "search.png", search_x, self.parallel_y + btn_y_offset, (icon_dim, icon_dim), action=lambda: self.handle_search("Parallel"), func = lambda image: colorize_image(image, COLOR_DARK))
+        self.parallel_play_btn = ClickableImage(APP_IMG_URL + "play.png", play_x, self.parallel_y + btn_y_offset, (icon_dim, icon_dim), action=lambda: self.start_solution_playback("Parallel"), func = lambda image: colorize_image(image, COLOR_DARK))
+
+        # HDA*
+        self.hda_y = algo_start_y + algo_row_h * 4
+        self.hda_label = LabelBox("HDA* (multi-core)", btn_x, self.hda_y, label_w, label_h, font_size=algo_label_font_size)
+        self.hda_search_btn = ClickableImage(APP_IMG_URL + "search.png", search_x, self.hda_y + btn_y_offset, (icon_dim, icon_dim), action=lambda: self.handle_search("HDA*"), func = lambda image: colorize_image(image, COLOR_DARK))
+        self.hda_play_btn = ClickableImage(APP_IMG_URL + "play.png", play_x, self.hda_y + btn_y_offset, (icon_dim, icon_dim), action=lambda: self.start_solution_playback("HDA*"), func = lambda image: colorize_image(image, COLOR_DARK))
+
         text_w = self.pieces_label_surf.get_width()
         self.pieces_label_pos = (left_center_x - text_w // 2, label_y)
 
@@ -255,6 +265,10 @@ class PuzzleScene(Scene):
         self.LEFT_PANEL_WIDTH = self.BOARD_X - (self.MARGIN * 2)
         self.RIGHT_PANEL_WIDTH = self.LEFT_PANEL_WIDTH 
 
+    def on_exit(self):
+        # A background worker or solver pool would otherwise keep searching for a scene nobody shows.
+        self.algorithm_handler.cancel_search()
+
     def update(self, event_list):
         self.update_screen()
         self.mouse_pos = pygame.mouse.get_pos()
@@ -291,10 +305,14 @@ class PuzzleScene(Scene):
             elif self.astar_search_btn.check_click(event): pass
             elif self.bfs_search_btn.check_click(event): pass
             elif self.dfs_search_btn.check_click(event): pass
+            elif self.parallel_search_btn.check_click(event): pass
+            elif self.hda_search_btn.check_click(event): pass
     
             elif self.algorithm_handler.has_solution("A*") and self.astar_play_btn.check_click(event): pass
             elif self.algorithm_handler.has_solution("BFS") and self.bfs_play_btn.check_click(event): pass
             elif self.algorithm_handler.has_solution("DFS") and self.dfs_play_btn.check_click(event): pass
+            elif self.algorithm_handler.has_solution("Parallel") and self.parallel_play_btn.check_click(event): pass
+            elif self.algorithm_handler.has_solution("HDA*") and self.hda_play_btn.check_click(event): pass
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
@@ -339,10 +357,14 @@ class PuzzleScene(Scene):
         self.astar_label.draw(screen)
         self.bfs_label.draw(screen)
         self.dfs_label.draw(screen)
+        self.parallel_label.draw(screen)
+        self.hda_label.draw(screen)
         
         self.astar_search_btn.draw(screen)
         self.bfs_search_btn.draw(screen)
         self.dfs_search_btn.draw(screen)
+        self.parallel_search_btn.draw(screen)
+        self.hda_search_btn.draw(screen)
 
         if self.algorithm_handler.has_solution("A*"):
             self.astar_play_btn.draw(screen)
@@ -350,6 +372,10 @@ class PuzzleScene(Scene):
             self.bfs_play_btn.draw(screen)
         if self.algorithm_handler.has_solution("DFS"):
             self.dfs_play_btn.draw(screen)
+        if self.algorithm_handler.has_solution("Parallel"):
+            self.parallel_play_btn.draw(screen)
+        if self.algorithm_handler.has_solution("HDA*"):
+            self.hda_play_btn.draw(screen)
 
         if self.animating and self.anim_piece:
             img = self.logic.get_image(self.anim_piece)
@@ -403,6 +429,7 @@ class PuzzleScene(Scene):
         self.algorithm_handler.start_search(algorithm_name)
 
     def handle_reset(self):
+        self.algorithm_handler.cancel_search()
         self.logic.reset()
         self.animating = False
         self.is_playing_solution = False
@@ -7,4 +7,8 @@ class Scene:
         pass
 
     def draw(self):
+        pass
+
+    def on_exit(self):
+        """Called when the scene is switched away from or the game quits."""
         pass
\ No newline at end of file
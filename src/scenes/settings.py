@@ -20,16 +20,19 @@ class SettingsScene(Scene):
 
         center_x = self.SCREEN_WIDTH // 2
         start_y = self.SCREEN_HEIGHT // 4
-        gap = self.SCREEN_HEIGHT // 8
+        gap = self.SCREEN_HEIGHT // 10
         
-        label_col_x = center_x - (self.SCREEN_WIDTH // 4) 
-        control_col_x = center_x + (self.SCREEN_WIDTH // 20)
-        
-        label_w = self.SCREEN_WIDTH // 5
+        # Two columns: playback and display on the left, search limits on the right.
+        label_w = self.SCREEN_WIDTH // 6
         label_h = self.SCREEN_HEIGHT // 15
-        slider_w = self.SCREEN_WIDTH // 6
+        slider_w = self.SCREEN_WIDTH // 8
         slider_h = int(label_h * 0.8)
 
+        label_col_x = self.SCREEN_WIDTH // 20
+        control_col_x = label_col_x + label_w + self.SCREEN_WIDTH // 40
+        limit_label_col_x = center_x + self.SCREEN_WIDTH // 40
+        limit_control_col_x = limit_label_col_x + label_w + self.SCREEN_WIDTH // 40
+
         self.anim_label = LabelBox("Search Animation", label_col_x, start_y, label_w, label_h, font_size=text_font_size)
         
         toggle_w = int(slider_w * 0.4)
@@ -46,10 +49,31 @@ class SettingsScene(Scene):
         self.search_speed_label = LabelBox("Search Speed", label_col_x, self.search_speed_y, label_w, label_h, font_size=text_font_size)
         self.search_speed_slider = Slider(control_col_x, self.search_speed_y + label_h//2, slider_w, slider_h, SEARCH_SPEED_LIMIT, settings.SEARCH_ANIMATION_DURATION, lambda val: self.set_attibute("SEARCH_ANIMATION_DURATION", val))
 
-        self.fps_y = self.search_speed_y + gap
+        self.frame_budget_y = self.search_speed_y + gap
+        self.frame_budget_label = LabelBox("Search Frame Budget", label_col_x, self.frame_budget_y, label_w, label_h, font_size=text_font_size)
+        self.frame_budget_slider = Slider(control_col_x, self.frame_budget_y + label_h//2, slider_w, slider_h, SEARCH_FRAME_BUDGET_LIMIT, settings.SEARCH_FRAME_BUDGET, lambda val: self.set_attibute("SEARCH_FRAME_BUDGET", val))
+
+        self.fps_y = self.frame_budget_y + gap
         self.fps_label = LabelBox("Target FPS", label_col_x, self.fps_y, label_w, label_h, font_size=text_font_size)
         self.fps_slider = Slider(control_col_x, self.fps_y + label_h//2, slider_w, slider_h, FPS_LIMIT, settings.FPS, lambda val: self.set_attibute("FPS", val))
 
+        self.timing_y = start_y
+        self.timing_label = LabelBox("Search Timing", limit_label_col_x, self.timing_y, label_w, label_h, font_size=text_font_size)
+        self.timing_toggle = ToggleSwitch(limit_control_col_x, self.timing_y + toggle_y_offset, toggle_w, toggle_h, settings.SEARCH_STATS_TIMING, lambda val: self.set_attibute("SEARCH_STATS_TIMING", val))
+
+        # A stored 0 (no limit, set by hand in user_settings.json) starts the slider at its top.
+        self.max_expansions_y = self.timing_y + gap
+        self.max_expansions_label = LabelBox("Node Limit", limit_label_col_x, self.max_expansions_y, label_w, label_h, font_size=text_font_size)
+        self.max_expansions_slider = Slider(limit_control_col_x, self.max_expansions_y + label_h//2, slider_w, slider_h, SEARCH_MAX_EXPANSIONS_LIMIT, settings.SEARCH_MAX_EXPANSIONS or SEARCH_MAX_EXPANSIONS_LIMIT[1], lambda val: self.set_attibute("SEARCH_MAX_EXPANSIONS", val))
+
+        self.max_seconds_y = self.max_expansions_y + gap
+        self.max_seconds_label = LabelBox("Time Limit", limit_label_col_x, self.max_seconds_y, label_w, label_h, font_size=text_font_size)
+        self.max_seconds_slider = Slider(limit_control_col_x, self.max_seconds_y + label_h//2, slider_w, slider_h, SEARCH_MAX_SECONDS_LIMIT, settings.SEARCH_MAX_SECONDS or SEARCH_MAX_SECONDS_LIMIT[1], lambda val: self.set_attibute("SEARCH_MAX_SECONDS", val))
+
+        self.memory_limit_y = self.max_seconds_y + gap
+        self.memory_limit_label = LabelBox("Memory Limit", limit_label_col_x, self.memory_limit_y, label_w, label_h, font_size=text_font_size)
+        self.memory_limit_slider = Slider(limit_control_col_x, self.memory_limit_y + label_h//2, slider_w, slider_h, SEARCH_MEMORY_LIMIT_LIMIT, settings.SEARCH_MEMORY_LIMIT or SEARCH_MEMORY_LIMIT_LIMIT[1], lambda val: self.set_attibute("SEARCH_MEMORY_LIMIT", val))
+
         btn_w = self.SCREEN_WIDTH // 6
         btn_h = self.SCREEN_HEIGHT // 12
         btn_y = self.SCREEN_HEIGHT - (self.SCREEN_HEIGHT // 6)
@@ -62,11 +86,16 @@ class SettingsScene(Scene):
     def update(self, event_list):
         for event in event_list:
             if self.anim_toggle.check_click(event): pass
+            elif self.timing_toggle.check_click(event): pass
             elif self.back_btn.check_click(event): pass
 
             self.play_speed_slider.handle_event(event)
             self.search_speed_slider.handle_event(event)
+            self.frame_budget_slider.handle_event(event)
             self.fps_slider.handle_event(event)
+            self.max_expansions_slider.handle_event(event)
+            self.max_seconds_slider.handle_event(event)
+            self.memory_limit_slider.handle_event(event)
 
     def draw(self):
         screen = pygame.display.get_surface()
@@ -76,20 +105,37 @@ class SettingsScene(Scene):
         self.anim_label.draw(screen)
         self.play_speed_label.draw(screen)
         self.search_speed_label.draw(screen)
+        self.frame_budget_label.draw(screen)
         self.fps_label.draw(screen)
+        self.timing_label.draw(screen)
+        self.max_expansions_label.draw(screen)
+        self.max_seconds_label.draw(screen)
+        self.memory_limit_label.draw(screen)
         
         self.anim_toggle.draw(screen)
+        self.timing_toggle.draw(screen)
         self.play_speed_slider.draw(screen)
         self.search_speed_slider.draw(screen)
+        self.frame_budget_slider.draw(screen)
         self.fps_slider.draw(screen)
+        self.max_expansions_slider.draw(screen)
+        self.max_seconds_slider.draw(screen)
+        self.memory_limit_slider.draw(screen)
         
         self.draw_value_text(screen, f"{settings.PLAY_ANIMATION_DURATION}ms", self.play_speed_slider)
         self.draw_value_text(screen, f"{settings.SEARCH_ANIMATION_DURATION}ms", self.search_speed_slider)
+        self.draw_value_text(screen, f"{settings.SEARCH_FRAME_BUDGET}ms/frame", self.frame_budget_slider)
         self.draw_value_text(screen, f"{settings.FPS}", self.fps_slider)
+        self.draw_value_text(screen, self.limit_text(settings.SEARCH_MAX_EXPANSIONS // 1000, "k nodes"), self.max_expansions_slider)
+        self.draw_value_text(screen, self.limit_text(settings.SEARCH_MAX_SECONDS, "s"), self.max_seconds_slider)
+        self.draw_value_text(screen, self.limit_text(settings.SEARCH_MEMORY_LIMIT, " MB"), self.memory_limit_slider)
 
         self.back_btn.draw(screen)
 
     def draw_value_text(self, screen, text, slider):
         surf = self.text_font.render(text, True, COLOR_LIGHT)
         padding_x = self.SCREEN_WIDTH // 50
-        screen.blit(surf, (slider.rect.right + padding_x, slider.rect.y - 10))
\ No newline at end of file
+        screen.blit(surf, (slider.rect.right + padding_x, slider.rect.y - 10))
+
+    def limit_text(self, value, unit):
+        return f"{value}{unit}" if value else "No limit"
@@ -6,6 +6,10 @@ from src.algorithms.algorithm import ChessSolver
 from src.algorithms.Astar import AStarSolver
 from src.algorithms.BFS import BFSSolver
 from src.algorithms.DFS import DFSSolver
+from src.algorithms.parallel import ParallelSolver
+from src.algorithms.hda import HDASolver
+from src.algorithms.solution_cache import solution_cache
+from src.algorithms.worker import SearchWorker
 from src.scenes.scene import Scene
 from src.ui.element import *
 import settings
@@ -13,7 +17,16 @@ import settings
 ALGORITHMS: dict[str, type[ChessSolver]]= {
     "A*": AStarSolver,
     "BFS": BFSSolver,
-    "DFS": DFSSolver
+    "DFS": DFSSolver,
+    "Parallel": ParallelSolver,
+    "HDA*": HDASolver
+}
+
+# Panel status for each way a search can run out of budget.
+STOP_STATUS_TEXT = {
+    "expansion_limit": "Node Limit",
+    "time_limit": "Time Limit",
+    "memory_limit": "Memory Limit",
 }
 
 class AlgorithmHandler:
@@ -34,15 +47,22 @@ class AlgorithmHandler:
         self.stats_panels = {
             "A*": StatsPanel(self.base_x, 0, self.panel_width, font_size=adaptive_font_size, text_list=["A* Status"]),
             "BFS": StatsPanel(self.base_x, 0, self.panel_width, font_size=adaptive_font_size, text_list=["BFS Status"]),
-            "DFS": StatsPanel(self.base_x, 0, self.panel_width, font_size=adaptive_font_size, text_list=["DFS Status"])
+            "DFS": StatsPanel(self.base_x, 0, self.panel_width, font_size=adaptive_font_size, text_list=["DFS Status"]),
+            "Parallel": StatsPanel(self.base_x, 0, self.panel_width, font_size=adaptive_font_size, text_list=["Parallel DFS Status"]),
+            "HDA*": StatsPanel(self.base_x, 0, self.panel_width, font_size=adaptive_font_size, text_list=["HDA* Status"])
         }
         
         self.active_algorithm_name = None 
         self.active_data = None
+        # Position the active search started from, the key its solution is cached under.
+        self.active_start_state = None
         self.iterator = None
-        self.solutions = {"A*": None, "BFS": None, "DFS": None}
+        self.worker = None
+        # Solution paths (lists of moves) per algorithm.
+        self.solutions = {"A*": None, "BFS": None, "DFS": None, "Parallel": None, "HDA*": None}
 
     def start_search(self, algorithm_name):
+        self.cancel_search()
         print(f"Starting {algorithm_name} search...")
         self.solutions[algorithm_name] = None
         self.active_algorithm_name = algorithm_name
@@ -50,51 +70,86 @@ class AlgorithmHandler:
         self.scene.is_playing_solution = False
         self.scene.playback_queue = []
 
-        self.stats_panels[algorithm_name].update_stats(status="Starting...", nodes=0, path=[], max_node_in_memory=0, compute_time=0.0)
-        
         algorithm_class = ALGORITHMS[algorithm_name]
-        self.iterator = self.logic.solver_iterator(self.scene, algorithm_class)
+        start_state = self.logic.puzzle.get_state()
+        cached = solution_cache().get(self.logic.mode, algorithm_class.__name__, start_state)
+        if cached is not None:
+            self.solutions[algorithm_name] = cached
+            self.stats_panels[algorithm_name].update_stats(status="Cached", path=copy.deepcopy(cached), stats={}, compute_time=0.0)
+            self.active_algorithm_name = None
+            return
+
+        self.active_start_state = start_state
+        self.stats_panels[algorithm_name].update_stats(status="Starting...", path=[], stats={}, compute_time=0.0)
+        
+        if settings.SEARCH_IN_BACKGROUND and not settings.SEARCH_ANIMATION and not algorithm_class.uses_processes:
+            # Nothing to animate, so the whole search can run on another core.
+            self.worker = SearchWorker(algorithm_class, self.logic.mode, start_state, settings.SEARCH_STATS_TIMING, settings.search_budget())
+        else:
+            self.iterator = self.logic.solver_iterator(self.scene, algorithm_class)
+
+    def cancel_search(self):
+        """Stops the running search, if any, and marks its panel as cancelled."""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        elif self.iterator is None:
+            return
+        else:
+            self.iterator.close()
+        self.iterator = None
+        if self.active_algorithm_name is not None:
+            self.stats_panels[self.active_algorithm_name].update_stats(status="Cancelled")
+            self.active_algorithm_name = None
 
     def update(self):
+        if self.worker is not None:
+            for status, data in self.worker.poll():
+                self.handle_status(status, data)
+            return
+
         if not self.iterator or self.scene.animating:
             return
 
         try:
             status, data = next(self.iterator)
-            panel = self.stats_panels[self.active_algorithm_name]
-            
-            if status == "running":
-                self.active_data = data
-                if settings.SEARCH_ANIMATION: 
-                    panel.update_stats(nodes=data[0], max_node_in_memory=data[1], compute_time=data[2], status="Searching...")
-            
-            elif status == "finished":
-                self.solutions[self.active_algorithm_name] = data
-                panel.update_stats(nodes=self.active_data[0], max_node_in_memory=self.active_data[1], compute_time=self.active_data[2], path=copy.deepcopy(data.get_final_path()), status="Solved!")
-                self.iterator = None 
-                self.active_algorithm_name = None 
-            
-            elif status == "failed":
-                panel.update_stats(status="No Path")
-                self.iterator = None
-                self.active_algorithm_name = None
-            
-            elif status == "error":
-                panel.update_stats(status="Error")
-                self.iterator = None
-                self.active_algorithm_name = None
-                
+            self.handle_status(status, data)
         except StopIteration:
             self.iterator = None
             self.active_algorithm_name = None
 
+    def handle_status(self, status, data):
+        panel = self.stats_panels[self.active_algorithm_name]
+        
+        if status == "running":
+            self.active_data = data
+            if settings.SEARCH_ANIMATION or self.worker is not None: 
+                panel.update_stats(stats=data, compute_time=data["compute_time"], status="Searching...")
+            return
+        
+        if status == "finished":
+            self.solutions[self.active_algorithm_name] = data
+            solution_cache().put(self.logic.mode, ALGORITHMS[self.active_algorithm_name].__name__, self.active_start_state, data)
+            panel.update_stats(stats=self.active_data, compute_time=self.active_data["compute_time"], path=copy.deepcopy(data), status="Solved!")
+        elif status == "failed":
+            panel.update_stats(status="No Path")
+        elif status in STOP_STATUS_TEXT:
+            panel.update_stats(stats=self.active_data, compute_time=self.active_data["compute_time"], status=STOP_STATUS_TEXT[status])
+        elif status == "error":
+            panel.update_stats(status="Error")
+        elif status == "cancelled":
+            panel.update_stats(status="Cancelled")
+        self.iterator = None
+        self.worker = None
+        self.active_algorithm_name = None
+
     def draw(self, screen):
         """
         Draws panels and dynamically updates their Y positions 
         so they stack neatly.
         """
         current_y = self.start_y
-        order = ["A*", "BFS", "DFS"]  
+        order = ["A*", "BFS", "DFS", "Parallel", "HDA*"]  
         for name in order:
             panel = self.stats_panels[name]
             panel.rect.y = current_y
@@ -102,15 +157,14 @@ class AlgorithmHandler:
             current_y += panel.rect.height + self.gap
 
     def has_solution(self, algorithm_name):
-        solver = self.solutions.get(algorithm_name)
-        return solver is not None and len(solver.get_final_path()) > 0
+        path = self.solutions.get(algorithm_name)
+        return path is not None and len(path) > 0
 
     def get_solution_path(self, algorithm_name):
-        return self.solutions[algorithm_name].get_final_path()
+        return self.solutions[algorithm_name]
     
     def reset(self):
-        self.iterator = None
-        self.active_algorithm_name = None
+        self.cancel_search()
         for name in self.solutions:
             self.solutions[name] = None
-            self.stats_panels[name].update_stats(status="Ready", nodes=0, path=[], max_node_in_memory=0, compute_time=0.0)
\ No newline at end of file
+            self.stats_panels[name].update_stats(status="Ready", path=[], stats={}, compute_time=0.0)
\ No newline at end of file
@@ -2,6 +2,7 @@ import pygame
 import sys
 
 from settings import *
+from src.algorithms.memory import format_bytes
 
 # --- Theme Colors ---
 THEME = {
@@ -260,11 +261,11 @@ class StatsPanel(UIElement):
         self.text_color = (255, 255, 255)
         self.base_text_list = text_list
 
-        self.nodes_visited = 0
         self.path_length = 0
         self.status = "Ready"
         self.path = None
-        self.max_node_in_memory = 0
+        # SearchStats.as_dict() of the latest report; empty before a search.
+        self.stats = {}
         self.compute_time = 0.0
         
         self.lines_to_draw = []
@@ -275,10 +276,9 @@ class StatsPanel(UIElement):
         
         self.recalculate_layout()
 
-    def update_stats(self, nodes=None, status=None, path=None, max_node_in_memory=None, compute_time = None):
-        if nodes is not None: self.nodes_visited = nodes
+    def update_stats(self, status=None, path=None, stats=None, compute_time = None):
         if status is not None: self.status = status
-        if max_node_in_memory is not None: self.max_node_in_memory = max_node_in_memory
+        if stats is not None: self.stats = stats
         if compute_time is not None: self.compute_time = compute_time
         if path is not None: 
             self.path = path
@@ -291,12 +291,20 @@ class StatsPanel(UIElement):
         self.lines_to_draw[-1] += f" - {self.status}"
         
         if self.path is not None:
-            if self.nodes_visited:
-                self.lines_to_draw.append(f"Nodes: {self.nodes_visited}")
+            stats = self.stats
+            if stats.get("generated"):
+                self.lines_to_draw.append(f"Nodes: {stats['expanded']} exp / {stats['generated']} gen")
+                self.lines_to_draw.append(f"Duplicates: {stats['duplicates']} | Visited: {stats['visited']}")
             if self.compute_time:
                 self.lines_to_draw.append(f"Compute Time: {self.compute_time * 1000:.2f} ms")
-            if self.max_node_in_memory:
-                self.lines_to_draw.append(f"Max Nodes in Memory: {self.max_node_in_memory}")
+            if stats.get("frontier_peak"):
+                self.lines_to_draw.append(f"Frontier: {stats['frontier']} (peak {stats['frontier_peak']})")
+            if stats.get("memory_peak"):
+                self.lines_to_draw.append(f"Memory: {format_bytes(stats['memory'])} (peak {format_bytes(stats['memory_peak'])})")
+            if stats.get("times") and self.compute_time:
+                share = {phase: f"{seconds / self.compute_time:.0%}" for phase, seconds in stats["times"].items()}
+                self.lines_to_draw.append(f"Move Gen: {share['movegen']} | Hashing: {share['hashing']}")
+                self.lines_to_draw.append(f"Heuristic: {share['heuristic']} | Queue: {share['queue']}")
             if self.path_length > 0:
                 self.lines_to_draw.append("Path:")
                 moves_str = []
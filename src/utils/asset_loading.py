@@ -1,8 +1,8 @@
 import pygame
 import os
-import json
 
 from settings import *
+from src.entities.puzzle_store import load_puzzle_store
 
 # --- Asset Loading ---
 
@@ -22,25 +22,12 @@ def load_images(square_size):
 
 def get_puzzle_limits(mode):
     """
-    Reads the puzzle_map.json for the given mode to find min/max pieces.
+    Reads the puzzle store of the given mode to find min/max pieces.
     Returns (min_pieces, max_pieces).
     """
-    try:
-        path = DATA_URL + f'chess_{mode}/puzzle_map.json'
-        if not os.path.exists(path):
-            return 1, 1
-            
-        with open(path) as json_data:
-            data = json.load(json_data)
-            keys = list(map(lambda x: int(x), data.keys()))
-            
-            if not keys:
-                return 1, 1
-                
-            return min(keys), max(keys)
-    except Exception as e:
-        print(f"Error loading limits for {mode}: {e}")
-        return 1, 1
+    store = load_puzzle_store(mode)
+    limits = store.limits() if store is not None else None
+    return limits or (1, 1)
     
 def colorize_image(image, new_color):
     image = image.copy()